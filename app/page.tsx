@@ -14,6 +14,8 @@ export default function Home() {
   const [length, setLength] = useState('medium');
   const [isGenerating, setIsGenerating] = useState(false);
   const [result, setResult] = useState<any>(null);
+  // inputs the current result was generated from, so language-only changes can reuse its session
+  const [generatedWith, setGeneratedWith] = useState('');
   const [error, setError] = useState('');
   const [copySuccess, setCopySuccess] = useState<string>('');
   const [apiKey, setApiKey] = useState<string>('');
@@ -69,21 +71,45 @@ export default function Home() {
     setIsGenerating(true);
     setError('');
 
+    const inputs = JSON.stringify({ prompt, contentType, tone, length });
+
     try {
-      const response = await fetch('http://localhost:8000/api/generate', {
-        method: 'POST',
-        headers: { 
-          'Content-Type': 'application/json',
-          'X-API-Key': apiKey
-        },
-        body: JSON.stringify({
-          prompt,
-          contentType,
-          targetLanguages: selectedLanguages,
-          tone,
-          length
-        })
-      });
+      let response: Response | null = null;
+      const translatedLanguages = new Set(result?.translations.map((translation) => translation.language) ?? []);
+      const addedLanguages = selectedLanguages.filter((language) => !translatedLanguages.has(language));
+      if (result?.sessionId && inputs === generatedWith && addedLanguages.length > 0) {
+        // same inputs with languages added: translate just those instead of regenerating everything;
+        // anything else (including a plain second click) regenerates in full
+        response = await fetch(`http://localhost:8000/api/sessions/${result.sessionId}/languages`, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+            'X-API-Key': apiKey
+          },
+          body: JSON.stringify({ targetLanguages: selectedLanguages })
+        });
+        if (response.status === 404) {
+          // session expired, fall back to a full generation
+          response = null;
+        }
+      }
+
+      if (!response) {
+        response = await fetch('http://localhost:8000/api/generate', {
+          method: 'POST',
+          headers: { 
+            'Content-Type': 'application/json',
+            'X-API-Key': apiKey
+          },
+          body: JSON.stringify({
+            prompt,
+            contentType,
+            targetLanguages: selectedLanguages,
+            tone,
+            length
+          })
+        });
+      }
 
       if (!response.ok) {
         const errorData = await response.json();
@@ -92,11 +118,13 @@ export default function Home() {
           setShowApiKeyModal(true);
           return;
         }
-        throw new Error(errorData.detail || 'Generation failed');
+        // some errors (e.g. 504) carry an object with a message and details
+        throw new Error(errorData.detail?.message || errorData.detail || 'Generation failed');
       }
 
       const data = await response.json();
       setResult(data);
+      setGeneratedWith(inputs);
     } catch (err: any) {
       setError(err.message);
     } finally {
@@ -2,6 +2,7 @@ import os
 from groq import Groq
 from .types import GroqConfig
 from .ai_agent import AIAgent
+from .linguist import Linguist, SyncLinguist
 
 def create_groq_config(api_key: str) -> GroqConfig:
     """Create a GroqConfig with the provided API key"""
@@ -9,11 +10,21 @@ def create_groq_config(api_key: str) -> GroqConfig:
         apiKey=api_key,
         model=os.getenv('GROQ_MODEL', 'qwen/qwen3-32b'),
         maxTokens=int(os.getenv('GROQ_MAX_TOKENS', '100000')),
-        temperature=float(os.getenv('GROQ_TEMPERATURE', '0.7'))
+        temperature=float(os.getenv('GROQ_TEMPERATURE', '0.7')),
+        chunkedTranslation=os.getenv('GROQ_CHUNKED_TRANSLATION', 'off'),
+        chunkMaxChars=int(os.getenv('GROQ_CHUNK_MAX_CHARS', '1500')),
+        pipelinedGeneration=os.getenv('GROQ_PIPELINED_GENERATION', 'false').lower() in ('1', 'true', 'yes'),
+        validateTranslations=os.getenv('GROQ_VALIDATE_TRANSLATIONS', 'false').lower() in ('1', 'true', 'yes'),
+        validationRetries=int(os.getenv('GROQ_VALIDATION_RETRIES', '2')),
+        maxContinuations=int(os.getenv('GROQ_MAX_CONTINUATIONS', '2')),
+        reasoningMode=os.getenv('GROQ_REASONING_MODE', 'full'),
+        translationReasoningMode=os.getenv('GROQ_TRANSLATION_REASONING_MODE', 'off')
     )
 
 __all__ = [
     'create_groq_config',
     'AIAgent',
-    'GroqConfig'
+    'GroqConfig',
+    'Linguist',
+    'SyncLinguist'
 ] 
\ No newline at end of file
@@ -0,0 +1,304 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, List, Optional
+from .types import AIAgentError
+
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# share of dispatches each lane gets while both have calls queued
+DEFAULT_LANE_WEIGHTS = {INTERACTIVE: 4.0, BULK: 1.0}
+
+# recent queue waits and request latencies kept per lane for percentiles
+LATENCY_SAMPLES = 1000
+
+
+class PriorityLane:
+    """Queued calls, running calls and latency samples for one priority class"""
+
+    def __init__(self, name: str, weight: float, max_in_flight: int):
+        self.name = name
+        self.weight = weight
+        self.max_in_flight = max_in_flight
+        # one FIFO per tenant, served round-robin so one big request can't starve the others
+        self.queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.queued = 0
+        self.in_flight = 0
+        # stride-scheduling position: lanes further behind are served first
+        self.pass_value = 0.0
+        self.admitted = 0
+        # times a full queue took an interactive call anyway, leaving this lane's calls to wait behind it
+        self.deferred = 0
+        self.queue_waits: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def has_room(self) -> bool:
+        return self.in_flight < self.max_in_flight
+
+    def stats(self) -> dict:
+        return {
+            "weight": self.weight,
+            "inFlight": self.in_flight,
+            "maxInFlight": self.max_in_flight,
+            "queueDepth": self.queued,
+            "admitted": self.admitted,
+            "deferred": self.deferred,
+            "queueWaitMs": _percentiles(self.queue_waits),
+            "latencyMs": _percentiles(self.latencies)
+        }
+
+
+class AdmissionController:
+    """Caps in-flight upstream calls and queues the rest fairly across lanes and API keys"""
+
+    def __init__(
+        self,
+        max_in_flight: int = 64,
+        max_queue: int = 1024,
+        max_wait_seconds: float = 30.0,
+        lane_weights: Optional[Dict[str, float]] = None,
+        bulk_max_share: float = 0.75
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.in_flight = 0
+        self.queued = 0
+        # bulk can't fill every slot, so interactive calls never wait behind running bulk work
+        self.lanes: Dict[str, PriorityLane] = {
+            name: PriorityLane(
+                name,
+                weight,
+                max(1, math.floor(max_in_flight * bulk_max_share)) if name == BULK else max_in_flight
+            )
+            for name, weight in (lane_weights or DEFAULT_LANE_WEIGHTS).items()
+        }
+        self.virtual_time = 0.0
+        # moving average of how long an upstream call holds its slot
+        self.avg_service_seconds = 2.0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def expected_wait(self, extra_calls: int = 1, lane: str = INTERACTIVE) -> float:
+        """Estimate how long a call arriving now in a lane would wait for a slot"""
+        own = self._lane(lane)
+        # other lanes' queued calls count in proportion to how often they'd be served first
+        ahead = own.queued + sum(
+            other.queued * min(1.0, other.weight / own.weight)
+            for other in self.lanes.values() if other is not own
+        )
+        free = min(self.max_in_flight - self.in_flight, own.max_in_flight - own.in_flight)
+        if ahead + extra_calls <= free:
+            return 0.0
+        waves = (ahead + extra_calls) / own.max_in_flight
+        return waves * self.avg_service_seconds
+
+    def check(self, expected_calls: int = 1, deadline_seconds: Optional[float] = None, lane: str = INTERACTIVE) -> None:
+        """Fail fast if a request's calls could not start within its deadline"""
+        deadline_seconds = self.max_wait_seconds if deadline_seconds is None else deadline_seconds
+        wait = self.expected_wait(min(expected_calls, self.max_in_flight), lane)
+        if self._queue_full(lane) or wait > deadline_seconds:
+            raise self._reject(wait)
+
+    @asynccontextmanager
+    async def slot(self, tenant: str, deadline_seconds: Optional[float] = None, lane: str = INTERACTIVE):
+        """Hold one upstream slot for the duration of the block"""
+        await self.acquire(tenant, deadline_seconds, lane)
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start_time
+            self.avg_service_seconds = 0.9 * self.avg_service_seconds + 0.1 * elapsed
+            self.release(lane)
+
+    async def acquire(self, tenant: str, deadline_seconds: Optional[float] = None, lane: str = INTERACTIVE) -> None:
+        """Wait for an upstream slot, or raise OVERLOADED if it can't be had in time"""
+        # a request's own deadline can only shorten the wait
+        deadline_seconds = self.max_wait_seconds if deadline_seconds is None else min(deadline_seconds, self.max_wait_seconds)
+        own = self._lane(lane)
+
+        # free slots only exist while every queued call is held back by its lane's cap
+        if self.in_flight < self.max_in_flight and own.has_room() and own.queued == 0:
+            self._grant(own)
+            own.queue_waits.append(0.0)
+            return
+
+        wait = self.expected_wait(1, lane)
+        if wait > deadline_seconds:
+            raise self._reject(wait)
+        if self._queue_full(lane):
+            raise self._reject(wait)
+        if lane != BULK and self._queue_full(BULK):
+            # only room because queued bulk calls don't count against this lane
+            self.lanes[BULK].deferred += 1
+
+        waiter = asyncio.get_running_loop().create_future()
+        if not own.queued:
+            # an idle lane rejoins at the current virtual time instead of cashing in saved credit
+            own.pass_value = max(own.pass_value, self.virtual_time)
+        own.queues.setdefault(tenant, deque()).append(waiter)
+        own.queued += 1
+        self.queued += 1
+        queued_at = time.monotonic()
+
+        try:
+            await asyncio.wait_for(waiter, timeout=deadline_seconds)
+            own.queue_waits.append(time.monotonic() - queued_at)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as error:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # the slot was handed over just as we gave up on it
+                self.release(lane)
+            else:
+                self._remove(own, tenant, waiter)
+
+            if isinstance(error, asyncio.CancelledError):
+                raise error
+            self.timed_out += 1
+            raise self._reject(self.expected_wait(1, lane))
+
+    def release(self, lane: str = INTERACTIVE) -> None:
+        """Return a slot and hand it to the next call by weighted-fair order"""
+        own = self._lane(lane)
+        own.in_flight = max(0, own.in_flight - 1)
+        self.in_flight = max(0, self.in_flight - 1)
+
+        while self.in_flight < self.max_in_flight:
+            candidates = [candidate for candidate in self.lanes.values() if candidate.queued and candidate.has_room()]
+            if not candidates:
+                break
+            next_lane = min(candidates, key=lambda candidate: candidate.pass_value)
+
+            tenant, queue = next(iter(next_lane.queues.items()))
+            waiter = queue.popleft()
+            next_lane.queued -= 1
+            self.queued -= 1
+
+            if queue:
+                next_lane.queues.move_to_end(tenant)
+            else:
+                del next_lane.queues[tenant]
+
+            if waiter.done():
+                continue
+            waiter.set_result(None)
+            self._grant(next_lane)
+            next_lane.pass_value += 1 / next_lane.weight
+            self.virtual_time = next_lane.pass_value
+
+    def record_latency(self, lane: str, seconds: float) -> None:
+        """Record a finished request's end-to-end latency in its lane"""
+        self._lane(lane).latencies.append(seconds)
+
+    def stats(self) -> dict:
+        """Current load, for the metrics endpoint"""
+        return {
+            "inFlight": self.in_flight,
+            "maxInFlight": self.max_in_flight,
+            "queueDepth": self.queued,
+            "maxQueue": self.max_queue,
+            "queuedTenants": sum(len(lane.queues) for lane in self.lanes.values()),
+            "expectedWaitSeconds": round(self.expected_wait(), 2),
+            "avgServiceSeconds": round(self.avg_service_seconds, 3),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timedOut": self.timed_out,
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()}
+        }
+
+    def _lane(self, name: str) -> PriorityLane:
+        return self.lanes.get(name) or self.lanes[INTERACTIVE]
+
+    def _grant(self, lane: PriorityLane) -> None:
+        self.in_flight += 1
+        self.admitted += 1
+        lane.in_flight += 1
+        lane.admitted += 1
+
+    def _queue_full(self, lane: str) -> bool:
+        """Whether a call in a lane has no room to queue
+
+        Queued bulk calls don't take room from interactive ones: a full queue
+        still takes interactive calls, and the bulk calls stay queued to be
+        served after them by lane weight, rather than failing their request.
+        """
+        queued = self.queued
+        if lane != BULK and BULK in self.lanes:
+            queued -= self.lanes[BULK].queued
+        return queued >= self.max_queue
+
+    def _remove(self, lane: PriorityLane, tenant: str, waiter: asyncio.Future) -> None:
+        queue = lane.queues.get(tenant)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        lane.queued -= 1
+        self.queued -= 1
+        if not queue:
+            del lane.queues[tenant]
+
+    def _reject(self, wait: float) -> AIAgentError:
+        self.rejected += 1
+        retry_after = max(1, math.ceil(wait))
+        return AIAgentError(
+            "OVERLOADED",
+            "Server is busy. Please try again shortly.",
+            {"retryAfter": retry_after, "queueDepth": self.queued}
+        )
+
+
+def _percentiles(samples: Deque[float]) -> dict:
+    if not samples:
+        return {"p50": None, "p95": None}
+    ordered = sorted(samples)
+    return {
+        "p50": round(ordered[len(ordered) // 2] * 1000),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000)
+    }
+
+
+def _parse_weights(value: str) -> Dict[str, float]:
+    """Parse "interactive=4,bulk=1" into lane weights"""
+    weights = dict(DEFAULT_LANE_WEIGHTS)
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() in weights and weight.strip():
+            weights[name.strip()] = max(0.01, float(weight))
+    return weights
+
+
+def _split_env(name: str) -> List[str]:
+    return [item.strip() for item in os.getenv(name, "").split(",") if item.strip()]
+
+
+def resolve_lane(header_value: Optional[str], api_key: str) -> str:
+    """Priority lane for a request: bulk for keys in ADMISSION_BULK_KEYS, else the X-Priority header"""
+    # a header can move a request down to bulk but can't lift a configured bulk key out of it
+    if api_key in _split_env('ADMISSION_BULK_KEYS'):
+        return BULK
+    if header_value and header_value.strip().lower() in (INTERACTIVE, BULK):
+        return header_value.strip().lower()
+    return INTERACTIVE
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get the process-wide admission controller configured from the environment"""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(
+            max_in_flight=int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '64')),
+            max_queue=int(os.getenv('ADMISSION_MAX_QUEUE', '1024')),
+            max_wait_seconds=float(os.getenv('ADMISSION_MAX_WAIT_SECONDS', '30')),
+            lane_weights=_parse_weights(os.getenv('ADMISSION_LANE_WEIGHTS', '')),
+            bulk_max_share=float(os.getenv('ADMISSION_BULK_MAX_SHARE', '0.75'))
+        )
+    return _controller
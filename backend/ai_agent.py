@@ -1,22 +1,43 @@
+import asyncio
 import time
-from typing import List, Optional
+import uuid
+from typing import AsyncIterator, List, Optional
 from .groq_service import GroqService
 from .types import (
     GenerationRequest, 
     GenerationResponse, 
+    GeneratedContent,
+    GenerationSession,
+    RetranslationRequest,
+    RetranslationResponse,
     GroqConfig,
+    Length,
     AIAgentError,
     validate_language_codes
 )
 from .prompts import generate_prompt
-from .utils import create_generated_content, clean_content
+from .request_context import gather_cancelling, current_request_context
+from .postprocess import get_postprocessor
+from .latency_model import get_latency_model
+from .shared_state import get_shared_state
+from .tracing import hash_text
+from .utils import (
+    create_generated_content,
+    clean_content,
+    remove_thinking_blocks,
+    split_paragraphs,
+    diff_paragraphs,
+    StreamSegmenter
+)
 
 
 class AIAgent:
     """AI Agent that orchestrates content generation and translation"""
     
     def __init__(self, config: GroqConfig):
+        self.config = config
         self.groq_service = GroqService(config)
+        self.postprocessor = get_postprocessor()
     
     async def generate_multilingual_content(self, request: GenerationRequest) -> GenerationResponse:
         """Generate multilingual content based on the request"""
@@ -25,48 +46,52 @@ class AIAgent:
         
         try:
             self._validate_request(request)
+            source_language, languages_to_translate = self._resolve_languages(request)
             
-            validation_result = validate_language_codes(request.targetLanguages)
-            valid_languages = validation_result["valid"]
-            invalid_languages = validation_result["invalid"]
-            
-            if invalid_languages:
-                raise AIAgentError(
-                    "VALIDATION_ERROR",
-                    f"Invalid language codes: {', '.join(invalid_languages)}",
-                    {"invalidLanguages": invalid_languages}
-                )
-            
-            print(f"Generating {request.contentType.value} content...")
-            original_content, original_tokens = await self._generate_original_content(request)
-            if original_tokens:
-                total_tokens += original_tokens
-            
-            source_language = request.sourceLanguage or "en"
-            languages_to_translate = [lang for lang in valid_languages if lang != source_language]
-            
-            translations = []
-            if languages_to_translate:
-                print(f"Translating to {len(languages_to_translate)} languages...")
-                translation_results, translation_tokens = await self.groq_service.translate_to_multiple_languages(
-                    original_content,
-                    languages_to_translate,
-                    source_language
+            translation_results = []
+            if self.config.pipelinedGeneration and languages_to_translate:
+                print(f"Generating {request.contentType.value} content and translating to "
+                      f"{len(languages_to_translate)} languages as it streams...")
+                original_content, translation_results, pipeline_tokens = await self._generate_pipelined(
+                    request, languages_to_translate, source_language
                 )
-                if translation_tokens:
-                    total_tokens += translation_tokens
+                total_tokens += pipeline_tokens
+            else:
+                print(f"Generating {request.contentType.value} content...")
+                original_content, original_tokens = await self._generate_original_content(request)
+                if original_tokens:
+                    total_tokens += original_tokens
                 
-                translations = [
-                    create_generated_content(result["language"], result["content"])
+                if languages_to_translate:
+                    print(f"Translating to {len(languages_to_translate)} languages...")
+                    translation_results, translation_tokens = await self.groq_service.translate_to_multiple_languages(
+                        original_content,
+                        languages_to_translate,
+                        source_language,
+                        chunked=self._use_chunking(request),
+                        content_type=request.contentType.value
+                    )
+                    if translation_tokens:
+                        total_tokens += translation_tokens
+            
+            # metadata/markdown passes are regex-heavy, so large outputs go to the worker pool
+            original, *translations = await asyncio.gather(
+                self.postprocessor.run(create_generated_content, source_language, original_content),
+                *[
+                    self.postprocessor.run(create_generated_content, result["language"], result["content"])
                     for result in translation_results
                 ]
+            )
             
+            context = current_request_context()
             response = GenerationResponse(
-                originalContent=create_generated_content(source_language, original_content),
+                originalContent=original,
                 translations=translations,
                 totalTokensUsed=total_tokens if total_tokens > 0 else None,
-                processingTime=int((time.time() - start_time) * 1000)
+                processingTime=int((time.time() - start_time) * 1000),
+                callUsage=list(context.call_usage) if context else None
             )
+            response.sessionId = await self._create_session(request, source_language, response)
             
             print(f"Generation completed in {response.processingTime}ms (tokens: {total_tokens})")
             return response
@@ -75,6 +100,246 @@ class AIAgent:
             print(f"Generation failed: {error}")
             raise error
     
+    async def add_languages(self, session_id: str, target_languages: List[str]) -> GenerationResponse:
+        """Translate a session's stored original into languages it doesn't have yet
+        
+        Languages the session already has are returned from it without calling the model.
+        """
+        start_time = time.time()
+        session = await self._load_session(session_id)
+        _, languages = self._resolve_languages(
+            session.request.model_copy(update={"targetLanguages": target_languages})
+        )
+        
+        stored = {translation.language: translation for translation in session.translations}
+        missing = [lang for lang in languages if lang not in stored]
+        total_tokens = 0
+        
+        if missing:
+            print(f"Session {session_id}: translating {len(missing)} new languages "
+                  f"({len(languages) - len(missing)} reused)")
+            translation_results, translation_tokens = await self.groq_service.translate_to_multiple_languages(
+                session.originalContent.content,
+                missing,
+                session.sourceLanguage,
+                chunked=self._use_chunking(session.request),
+                content_type=session.request.contentType.value
+            )
+            total_tokens += translation_tokens or 0
+            added = await asyncio.gather(*[
+                self.postprocessor.run(create_generated_content, result["language"], result["content"])
+                for result in translation_results
+            ])
+            for translation in added:
+                stored[translation.language] = translation
+            
+            # another request may have added languages meanwhile, so merge into the latest copy
+            latest = await self._load_session(session_id)
+            merged = {translation.language: translation for translation in latest.translations}
+            merged.update({translation.language: translation for translation in added})
+            latest.translations = list(merged.values())
+            await get_shared_state().save_session(session_id, latest.model_dump_json())
+        
+        context = current_request_context()
+        return GenerationResponse(
+            originalContent=session.originalContent,
+            translations=[stored[lang] for lang in languages],
+            totalTokensUsed=total_tokens if total_tokens > 0 else None,
+            processingTime=int((time.time() - start_time) * 1000),
+            callUsage=list(context.call_usage) if context else None,
+            sessionId=session_id
+        )
+    
+    async def stream_multilingual_content(self, request: GenerationRequest) -> AsyncIterator[GeneratedContent]:
+        """Yield the original as soon as it is written, then each translation as it finishes"""
+        self._validate_request(request)
+        source_language, languages_to_translate = self._resolve_languages(request)
+        
+        original_content, _ = await self._generate_original_content(request)
+        yield await self.postprocessor.run(create_generated_content, source_language, original_content)
+        
+        tasks = [
+            asyncio.create_task(self.groq_service.translate_to_multiple_languages(
+                original_content,
+                [lang],
+                source_language,
+                chunked=self._use_chunking(request),
+                content_type=request.contentType.value
+            ))
+            for lang in get_latency_model().order(languages_to_translate, len(original_content))
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                results, _ = await next_done
+                yield await self.postprocessor.run(create_generated_content, results[0]["language"], results[0]["content"])
+        finally:
+            # consumer stopped early or one language failed
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def retranslate_content(self, request: RetranslationRequest) -> RetranslationResponse:
+        """Re-translate edited content, only sending changed paragraphs to the model"""
+        start_time = time.time()
+        total_tokens = 0
+        
+        previous = request.previousGeneration
+        source_language = request.sourceLanguage or previous.originalContent.language
+        content_type = request.contentType.value if request.contentType else None
+        
+        previous_paragraphs = split_paragraphs(previous.originalContent.content)
+        edited_paragraphs = split_paragraphs(request.editedContent)
+        opcodes = diff_paragraphs(previous_paragraphs, edited_paragraphs)
+        changed_blocks = [(j1, j2) for tag, _, _, j1, j2 in opcodes if tag in ("replace", "insert")]
+        changed_paragraphs = sum(j2 - j1 for j1, j2 in changed_blocks)
+        
+        async def translate_block(language: str, j1: int, j2: int) -> str:
+            nonlocal total_tokens
+            
+            segment = "\n\n".join(edited_paragraphs[j1:j2])
+            context_before = edited_paragraphs[j1 - 1] if j1 > 0 else None
+            context_after = edited_paragraphs[j2] if j2 < len(edited_paragraphs) else None
+            translated_segment, tokens = await self.groq_service.translate_segment(
+                segment, language, source_language, context_before, context_after, content_type
+            )
+            if tokens:
+                total_tokens += tokens
+            return translated_segment.strip()
+        
+        async def splice_single(translation: GeneratedContent) -> GeneratedContent:
+            translated_paragraphs = split_paragraphs(translation.content)
+            new_blocks = await gather_cancelling(
+                *[translate_block(translation.language, j1, j2) for j1, j2 in changed_blocks]
+            )
+            block_translations = dict(zip(changed_blocks, new_blocks))
+            
+            parts = []
+            for tag, i1, i2, j1, j2 in opcodes:
+                if tag == "equal":
+                    parts.extend(translated_paragraphs[i1:i2])
+                elif tag in ("replace", "insert"):
+                    parts.append(block_translations[(j1, j2)])
+            return await self.postprocessor.run(create_generated_content, translation.language, "\n\n".join(parts))
+        
+        try:
+            # a translation can only be spliced if it kept the original's paragraph structure
+            spliceable = [
+                t for t in previous.translations
+                if len(split_paragraphs(t.content)) == len(previous_paragraphs)
+            ]
+            misaligned = [t.language for t in previous.translations if t not in spliceable]
+            
+            spliced = await gather_cancelling(*[splice_single(t) for t in spliceable])
+            
+            retranslated = []
+            if misaligned:
+                print(f"Paragraph structure changed for {len(misaligned)} languages, translating in full...")
+                results, tokens = await self.groq_service.translate_to_multiple_languages(
+                    request.editedContent,
+                    misaligned,
+                    source_language,
+                    content_type=content_type
+                )
+                if tokens:
+                    total_tokens += tokens
+                retranslated = await asyncio.gather(*[
+                    self.postprocessor.run(create_generated_content, r["language"], r["content"]) for r in results
+                ])
+            
+            # keep the language order of the previous generation
+            by_language = {t.language: t for t in list(spliced) + list(retranslated)}
+            translations = [by_language[t.language] for t in previous.translations]
+            
+            reused = (len(edited_paragraphs) - changed_paragraphs) * len(spliceable)
+            possible = len(edited_paragraphs) * len(previous.translations)
+            
+            response = RetranslationResponse(
+                originalContent=await self.postprocessor.run(
+                    create_generated_content, source_language, request.editedContent
+                ),
+                translations=translations,
+                changedParagraphs=changed_paragraphs,
+                totalParagraphs=len(edited_paragraphs),
+                reuseRatio=round(reused / possible, 3) if possible else 1.0,
+                totalTokensUsed=total_tokens if total_tokens > 0 else None,
+                processingTime=int((time.time() - start_time) * 1000)
+            )
+            
+            print(f"Re-translation completed in {response.processingTime}ms "
+                  f"({changed_paragraphs}/{len(edited_paragraphs)} paragraphs changed, reuse {response.reuseRatio:.0%})")
+            return response
+            
+        except Exception as error:
+            print(f"Re-translation failed: {error}")
+            raise error
+    
+    async def _generate_pipelined(
+        self,
+        request: GenerationRequest,
+        languages: List[str],
+        source_language: str
+    ) -> tuple[str, List[dict], int]:
+        """Stream the original and translate each paragraph segment as soon as it is complete"""
+        system_prompt, user_prompt = generate_prompt(
+            request.contentType,
+            request.prompt,
+            request.tone or "professional",
+            request.length or "medium"
+        )
+        
+        # segments are a fraction of a translation chunk so translation starts early
+        segmenter = StreamSegmenter(min_chars=(self.config.chunkMaxChars or 1500) // 3)
+        segments: List[str] = []
+        segment_tasks: List[dict] = []
+        tokens = {"original": 0}
+        
+        def dispatch(segment: str) -> None:
+            cleaned = remove_thinking_blocks(segment)
+            if not cleaned:
+                return
+            context_before = segments[-1] if segments else None
+            segments.append(cleaned)
+            segment_tasks.append({
+                lang: asyncio.create_task(self.groq_service.translate_segment_with_memory(
+                    cleaned, lang, source_language, context_before, request.contentType.value
+                ))
+                for lang in get_latency_model().order(languages, len(cleaned))
+            })
+        
+        def record_usage(total_tokens: int) -> None:
+            tokens["original"] = total_tokens
+        
+        try:
+            async for text in self.groq_service.stream_content(user_prompt, system_prompt, on_usage=record_usage):
+                for segment in segmenter.feed(text):
+                    dispatch(segment)
+            for segment in segmenter.flush():
+                dispatch(segment)
+            
+            if not segments:
+                raise AIAgentError("API_ERROR", "No content generated from Groq API")
+            
+            all_tasks = [task for tasks in segment_tasks for task in tasks.values()]
+            await gather_cancelling(*all_tasks)
+        except BaseException:
+            all_tasks = [task for tasks in segment_tasks for task in tasks.values()]
+            for task in all_tasks:
+                task.cancel()
+            await asyncio.gather(*all_tasks, return_exceptions=True)
+            raise
+        
+        total_tokens = tokens["original"]
+        results = []
+        for lang in languages:
+            parts = []
+            for tasks in segment_tasks:
+                translated_segment, segment_tokens = tasks[lang].result()
+                total_tokens += segment_tokens or 0
+                parts.append(translated_segment.strip())
+            results.append({"language": lang, "content": "\n\n".join(parts)})
+        
+        return "\n\n".join(segments), results, total_tokens
+    
     async def _generate_original_content(self, request: GenerationRequest) -> tuple[str, Optional[int]]:
         """Generate the original content based on the request"""
         system_prompt, user_prompt = generate_prompt(
@@ -86,6 +351,63 @@ class AIAgent:
         
         return await self.groq_service.generate_content(user_prompt, system_prompt)
     
+    async def _create_session(
+        self,
+        request: GenerationRequest,
+        source_language: str,
+        response: GenerationResponse
+    ) -> Optional[str]:
+        """Store a generation so later languages can be added to it; None if sessions are off"""
+        shared = get_shared_state()
+        if not shared.session_ttl:
+            return None
+        
+        session = GenerationSession(
+            sessionId=uuid.uuid4().hex,
+            keyHash=hash_text(self.config.apiKey),
+            request=request,
+            sourceLanguage=source_language,
+            originalContent=response.originalContent,
+            translations=response.translations,
+            createdAt=time.time()
+        )
+        await shared.save_session(session.sessionId, session.model_dump_json())
+        return session.sessionId
+    
+    async def _load_session(self, session_id: str) -> GenerationSession:
+        """Load a session created with this API key"""
+        stored = await get_shared_state().load_session(session_id)
+        session = GenerationSession.model_validate_json(stored) if stored else None
+        # someone else's session looks the same as an expired one
+        if session is None or session.keyHash != hash_text(self.config.apiKey):
+            raise AIAgentError(
+                "NOT_FOUND",
+                "Generation session not found or expired. Generate the content again.",
+                {"sessionId": session_id}
+            )
+        return session
+    
+    def _resolve_languages(self, request: GenerationRequest) -> tuple[str, List[str]]:
+        """Source language and the valid target languages that need translating"""
+        validation_result = validate_language_codes(request.targetLanguages)
+        valid_languages = validation_result["valid"]
+        invalid_languages = validation_result["invalid"]
+        
+        if invalid_languages:
+            raise AIAgentError(
+                "VALIDATION_ERROR",
+                f"Invalid language codes: {', '.join(invalid_languages)}",
+                {"invalidLanguages": invalid_languages}
+            )
+        
+        source_language = request.sourceLanguage or "en"
+        return source_language, [lang for lang in valid_languages if lang != source_language]
+    
+    def _use_chunking(self, request: GenerationRequest) -> bool:
+        return self.config.chunkedTranslation == "always" or (
+            self.config.chunkedTranslation == "long" and request.length == Length.LONG
+        )
+    
     def _validate_request(self, request: GenerationRequest) -> None:
         """Validate the generation request"""
         
@@ -0,0 +1,241 @@
+import asyncio
+import os
+import re
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from .admission import INTERACTIVE
+from .request_context import RequestContext, current_request_context, set_request_context
+from .types import CallUsage, RouteDecision
+from .validation import TranslationValidator
+
+if TYPE_CHECKING:
+    from .groq_service import GroqService
+
+
+BATCH_SYSTEM_PROMPT = "You are a professional translation tool. You translate several unrelated segments in one reply, each completely, keeping every segment marker exactly as given. Output only the markers and translated text with no explanations or commentary."
+
+MARKER_PATTERN = re.compile(r"^[ \t]*<<<(\d+)>>>[ \t]*$", re.MULTILINE)
+
+
+class _Batch:
+    """Segments waiting to go out together in one completion"""
+
+    def __init__(self, service: "GroqService", route: RouteDecision, source_language: str, lane: str):
+        self.service = service
+        self.route = route
+        self.source_language = source_language
+        self.lane = lane
+        # (content, future, request context) per caller
+        self.items: List[Tuple[str, asyncio.Future, Optional[RequestContext]]] = []
+        self.chars = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class TranslationBatcher:
+    """Collects short translations into the same language across requests into one upstream call
+
+    Jobs with the same caller key, model, language pair and priority lane
+    that arrive within a short window are sent as one numbered multi-segment
+    completion. A window that ends with a single job, a failed call or a reply
+    that doesn't parse sends each job on its own as usual.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 0.02,
+        max_segments: int = 8,
+        max_chars: int = 4000,
+        max_segment_chars: int = 600
+    ):
+        self.window_seconds = window_seconds
+        self.max_segments = max_segments
+        self.max_chars = max_chars
+        self.max_segment_chars = max_segment_chars
+        self.pending: Dict[tuple, _Batch] = {}
+
+        self.batches = 0
+        self.batched_segments = 0
+        self.unbatched = 0
+        self.fallbacks = 0
+        self.parse_failures = 0
+
+    def accepts(self, content: str, context_before: Optional[str] = None, context_after: Optional[str] = None) -> bool:
+        """Only short, self-contained segments are worth batching"""
+        return not context_before and not context_after and len(content) <= self.max_segment_chars
+
+    async def translate(
+        self,
+        service: "GroqService",
+        route: RouteDecision,
+        content: str,
+        source_language: str
+    ) -> Optional[Tuple[str, Optional[int]]]:
+        """Translate content as part of a batch; None means the caller should translate it alone"""
+        context = current_request_context()
+        lane = context.priority if context else INTERACTIVE
+        key = (service.config.apiKey, route.model, route.reasoningMode, source_language, route.language, lane)
+
+        batch = self.pending.get(key)
+        if batch is not None and batch.chars + len(content) > self.max_chars:
+            self._flush(key, batch)
+            batch = None
+        if batch is None:
+            batch = _Batch(service, route, source_language, lane)
+            batch.timer = asyncio.get_running_loop().call_later(self.window_seconds, self._flush, key, batch)
+            self.pending[key] = batch
+
+        future = asyncio.get_running_loop().create_future()
+        batch.items.append((content, future, context))
+        batch.chars += len(content)
+        if len(batch.items) >= self.max_segments:
+            self._flush(key, batch)
+
+        return await future
+
+    def stats(self) -> dict:
+        """Counters for the metrics endpoint"""
+        return {
+            "batches": self.batches,
+            "batchedSegments": self.batched_segments,
+            # upstream calls avoided by batching
+            "callsSaved": self.batched_segments - self.batches,
+            "unbatched": self.unbatched,
+            "fallbacks": self.fallbacks,
+            "parseFailures": self.parse_failures
+        }
+
+    def _flush(self, key: tuple, batch: _Batch) -> None:
+        if self.pending.get(key) is batch:
+            del self.pending[key]
+        if batch.timer:
+            batch.timer.cancel()
+            batch.timer = None
+        asyncio.get_running_loop().create_task(self._send(batch))
+
+    async def _send(self, batch: _Batch) -> None:
+        # callers cancelled while waiting drop out of the batch
+        items = [(content, future, caller) for content, future, caller in batch.items if not future.done()]
+        if len(items) < 2:
+            self.unbatched += len(items)
+            _resolve_all(items, None)
+            return
+
+        # the call runs on behalf of several requests: the tightest deadline, the shared lane
+        deadlines = [caller.deadline for _, _, caller in items if caller and caller.deadline is not None]
+        deadline_seconds = min(deadlines) - time.monotonic() if deadlines else None
+        if deadline_seconds is not None and deadline_seconds <= 0:
+            _resolve_all(items, None)
+            return
+        context = RequestContext(deadline_seconds, batch.lane, "translation-batch")
+        set_request_context(context)
+
+        service = batch.service
+        target_language = batch.route.language or ""
+        total_chars = sum(len(content) for content, _, _ in items)
+        route = batch.route.model_copy(update={"contentLength": total_chars})
+        try:
+            output, tokens = await service.generate_content(
+                _build_batch_prompt([content for content, _, _ in items], batch.source_language, target_language),
+                BATCH_SYSTEM_PROMPT,
+                route=route
+            )
+        except Exception as error:
+            print(f"Batched translation of {len(items)} segments failed ({error}), translating individually")
+            self.fallbacks += 1
+            _resolve_all(items, None)
+            return
+        finally:
+            context.finish()
+
+        translations = parse_batch_output(output, len(items))
+        if translations is None:
+            print(f"Batched translation reply for {len(items)} segments didn't parse, translating individually")
+            self.parse_failures += 1
+            _resolve_all(items, None)
+            return
+
+        self.batches += 1
+        self.batched_segments += len(items)
+        for (content, future, caller), translated in zip(items, translations):
+            if future.done():
+                continue
+            # tokens split by segment length so each request's usage still adds up
+            fraction = len(content) / total_chars if total_chars else 0
+            share = round(tokens * fraction) if tokens else None
+            if caller:
+                # the call ran under the batch's own context; give each caller its part of it
+                for usage in context.call_usage:
+                    caller.call_usage.append(_usage_share(usage, fraction))
+                caller.record_completed(share)
+            if service.config.validateTranslations and TranslationValidator(
+                content, target_language, batch.source_language
+            ).check(translated, final=True):
+                # one bad segment shouldn't cost the others their batched result
+                future.set_result(None)
+                continue
+            future.set_result((translated, share))
+
+
+def parse_batch_output(output: str, count: int) -> Optional[List[str]]:
+    """Translations in marker order, or None unless every marker appears once with text after it"""
+    markers = list(MARKER_PATTERN.finditer(output))
+    if [int(marker.group(1)) for marker in markers] != list(range(1, count + 1)):
+        return None
+
+    translations = []
+    for index, marker in enumerate(markers):
+        end = markers[index + 1].start() if index + 1 < len(markers) else len(output)
+        translated = output[marker.end():end].strip()
+        if not translated:
+            return None
+        translations.append(translated)
+    return translations
+
+
+def _build_batch_prompt(segments: List[str], source_language: str, target_language: str) -> str:
+    numbered = "\n\n".join(f"<<<{index}>>>\n{segment}" for index, segment in enumerate(segments, 1))
+    return f"""TRANSLATE EACH NUMBERED SEGMENT BELOW FROM {source_language.upper()} TO {target_language.upper()}:
+
+{numbered}
+
+            CRITICAL REQUIREMENTS:
+            1. The segments are unrelated - translate each one on its own, completely
+            2. Output each marker line (<<<1>>>, <<<2>>>, ...) exactly as given, followed by its translation
+            3. Keep every segment's formatting and do not merge, split or skip segments
+            4. Output ONLY the markers and translations with no explanations
+
+            TRANSLATE EVERY SEGMENT - START NOW:"""
+
+
+def _usage_share(usage: CallUsage, fraction: float) -> CallUsage:
+    """A caller's part of a batched call's usage; the latency was the same for all of them"""
+    def scaled(tokens: Optional[int]) -> Optional[int]:
+        return round(tokens * fraction) if tokens is not None else None
+
+    return usage.model_copy(update={
+        "promptTokens": scaled(usage.promptTokens),
+        "completionTokens": scaled(usage.completionTokens),
+        "visibleTokens": scaled(usage.visibleTokens)
+    })
+
+
+def _resolve_all(items: List[Tuple[str, asyncio.Future, Optional[RequestContext]]], result) -> None:
+    for _, future, _ in items:
+        if not future.done():
+            future.set_result(result)
+
+
+_batcher: Optional[TranslationBatcher] = None
+
+
+def get_translation_batcher() -> Optional[TranslationBatcher]:
+    """Get the batcher if TRANSLATION_BATCHING is enabled, otherwise None"""
+    global _batcher
+    if _batcher is None and os.getenv('TRANSLATION_BATCHING', 'false').lower() in ('1', 'true', 'yes'):
+        _batcher = TranslationBatcher(
+            window_seconds=float(os.getenv('BATCH_WINDOW_MS', '20')) / 1000,
+            max_segments=int(os.getenv('BATCH_MAX_SEGMENTS', '8')),
+            max_chars=int(os.getenv('BATCH_MAX_CHARS', '4000')),
+            max_segment_chars=int(os.getenv('BATCH_MAX_SEGMENT_CHARS', '600'))
+        )
+    return _batcher
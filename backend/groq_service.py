@@ -1,10 +1,79 @@
 import asyncio
 import random
 import time
-from typing import List, Dict, Optional
-from groq import Groq
-from .types import GroqConfig, AIAgentError
-from .utils import remove_thinking_blocks
+import weakref
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, List, Dict, Optional
+import httpx
+from groq import AsyncGroq, DefaultAsyncHttpxClient
+from .types import GroqConfig, RouteDecision, CallUsage, AIAgentError
+from .routing import get_model_router, reasoning_options
+from .admission import INTERACTIVE, get_admission_controller
+from .postprocess import get_postprocessor
+from .shared_state import get_shared_state
+from .latency_model import get_latency_model
+from .tracing import hash_text
+from .readiness import get_upstream_health
+from .translation_memory import MemoryMatch, TranslationMemory, get_translation_memory
+from .batching import get_translation_batcher
+from .request_context import RequestContext, current_request_context, gather_cancelling, track_call
+from .utils import remove_thinking_blocks, split_into_chunks, split_paragraphs, strip_overlap
+from .validation import TranslationValidator, split_reasoning
+
+
+TRANSLATION_SYSTEM_PROMPT = "You are a professional translation tool. Your job is to translate ALL content completely from start to finish. Use all available tokens to ensure the translation is complete. Output only the translated text with no explanations or commentary."
+
+# visible characters between validation checks on a streamed translation
+VALIDATION_PROBE_CHARS = 300
+
+# process-wide visible vs total completion tokens per reasoning mode, exposed on /metrics
+REASONING_STATS: Dict[str, Dict[str, int]] = {}
+
+# output tail sent back when continuing a truncated completion
+CONTINUATION_TAIL_CHARS = 2000
+# characters of a streamed continuation buffered before checking it for a repeated tail
+CONTINUATION_OVERLAP_CHARS = 200
+
+# characters of neighbouring content shown to the model around each chunk
+CHUNK_CONTEXT_CHARS = 300
+
+
+# clients kept per key (and event loop); they're cheap, since all of them share one connection pool
+MAX_POOLED_CLIENTS = 256
+
+# one HTTP connection pool per event loop, shared by every key's client
+_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+_client_pool: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, OrderedDict[str, AsyncGroq]]" = weakref.WeakKeyDictionary()
+
+
+def get_groq_client(api_key: str) -> AsyncGroq:
+    """Get the long-lived async client for an API key on the running event loop"""
+    loop = asyncio.get_running_loop()
+    clients = _client_pool.setdefault(loop, OrderedDict())
+    if api_key in clients:
+        clients.move_to_end(api_key)
+    else:
+        http_client = _http_clients.get(loop)
+        if http_client is None:
+            http_client = _http_clients[loop] = DefaultAsyncHttpxClient()
+        # async client so parallel translations don't block each other on the event loop; the
+        # key only goes into request headers, so a new or evicted client opens and holds no connections
+        clients[api_key] = AsyncGroq(api_key=api_key, http_client=http_client)
+        if len(clients) > MAX_POOLED_CLIENTS:
+            # not closed: closing would close the shared pool under every other key
+            clients.popitem(last=False)
+    return clients[api_key]
+
+
+async def close_groq_clients() -> None:
+    """Close the connection pool of the running event loop and drop its clients"""
+    loop = asyncio.get_running_loop()
+    _client_pool.pop(loop, None)
+    http_client = _http_clients.pop(loop, None)
+    if http_client is not None:
+        await http_client.aclose()
 
 
 class GroqService:
@@ -12,26 +81,62 @@ class GroqService:
     
     def __init__(self, config: GroqConfig):
         self.config = config
-        self.client = Groq(api_key=config.apiKey)
+        self.router = get_model_router()
+        self.admission = get_admission_controller()
+        self.postprocessor = get_postprocessor()
+        self.shared = get_shared_state()
+        self.batcher = get_translation_batcher()
+    
+    @property
+    def memory(self) -> Optional[TranslationMemory]:
+        """The translation memory, looked up per use since it only appears once its file has loaded"""
+        return get_translation_memory()
     
-    async def generate_content(self, prompt: str, system_prompt: Optional[str] = None) -> tuple[str, Optional[int]]:
+    async def generate_content(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        route: Optional[RouteDecision] = None
+    ) -> tuple[str, Optional[int]]:
         """Generate content using Groq API with retry logic"""
+        context = current_request_context()
+        
+        try:
+            content, tokens_used = await self._generate_with_retries(prompt, system_prompt, route, context)
+        except asyncio.CancelledError:
+            # client went away or a sibling translation failed - count what we didn't spend
+            if context:
+                context.record_cancelled(len(prompt) + len(system_prompt or ""))
+            raise
+        
+        if context:
+            context.record_completed(tokens_used)
+        return content, tokens_used
+    
+    async def _generate_with_retries(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        route: Optional[RouteDecision],
+        context: Optional[RequestContext]
+    ) -> tuple[str, Optional[int]]:
+        """Call the Groq API, retrying transient errors with backoff within the request deadline"""
         max_retries = 3
         last_error = None
         
         for attempt in range(1, max_retries + 1):
+            if context:
+                context.check_deadline()
+            
             try:
                 messages = []
                 if system_prompt:
                     messages.append({"role": "system", "content": system_prompt})
                 messages.append({"role": "user", "content": prompt})
                 
-                completion = self.client.chat.completions.create(
-                    messages=messages,
-                    model=self.config.model,
-                    max_tokens=self.config.maxTokens,
-                    temperature=self.config.temperature,
-                )
+                # pick the key per attempt so a retry after a 429 can move to another key
+                call_route = self.router.rekey(route, self.config) if route else self.router.route(self.config)
+                completion = await self._create_completion(call_route, messages, context)
                 
                 content = completion.choices[0].message.content
                 if not content:
@@ -41,31 +146,398 @@ class GroqService:
                 if hasattr(completion, 'usage') and completion.usage:
                     tokens_used = completion.usage.total_tokens
                 
+                if getattr(completion.choices[0], 'finish_reason', None) == "length":
+                    content, continuation_tokens = await self._continue_truncated(messages, content, call_route, context)
+                    if continuation_tokens:
+                        tokens_used = (tokens_used or 0) + continuation_tokens
+                
                 # remove thinking blocks and return content with token count
-                return remove_thinking_blocks(content), tokens_used
+                return await self.postprocessor.run(remove_thinking_blocks, content), tokens_used
                 
+            except AIAgentError as error:
+                # already categorized (e.g. OVERLOADED from admission control)
+                raise error
+            
             except Exception as error:
                 last_error = error
                 print(f"Groq API Error (attempt {attempt}/{max_retries}): {error}")
                 
-                # check if this is a retryable error
-                is_retryable = (
-                    hasattr(error, 'status_code') and error.status_code in [503, 502, 504, 429]
-                ) or "503" in str(error) or "502" in str(error) or "504" in str(error) or "429" in str(error)
+                await self._backoff_or_raise(error, attempt, max_retries, context)
+        
+        raise self._handle_groq_error(last_error)
+    
+    async def _continue_truncated(
+        self,
+        messages: List[dict],
+        content: str,
+        route: RouteDecision,
+        context: Optional[RequestContext]
+    ) -> tuple[str, Optional[int]]:
+        """Resume a completion cut off by the token limit instead of regenerating it"""
+        total_tokens = 0
+        
+        for continuation in range(1, self.config.maxContinuations + 1):
+            print(f"Completion truncated at {len(content)} chars, continuing ({continuation}/{self.config.maxContinuations})...")
+            
+            # prefill the assistant turn with our tail so the model picks up mid-sentence
+            continuation_messages = messages + [{"role": "assistant", "content": content[-CONTINUATION_TAIL_CHARS:]}]
+            completion = await self._create_completion(route, continuation_messages, context)
+            
+            if completion.usage:
+                total_tokens += completion.usage.total_tokens
+            
+            content += strip_overlap(content, completion.choices[0].message.content or "")
+            if completion.choices[0].finish_reason != "length":
+                break
+        
+        return content, total_tokens or None
+    
+    async def _backoff_or_raise(
+        self,
+        error: Exception,
+        attempt: int,
+        max_retries: int,
+        context: Optional[RequestContext]
+    ) -> None:
+        """Sleep before the next attempt, or raise if the error isn't worth retrying"""
+        # check if this is a retryable error
+        is_retryable = (
+            hasattr(error, 'status_code') and error.status_code in [503, 502, 504, 429]
+        ) or "503" in str(error) or "502" in str(error) or "504" in str(error) or "429" in str(error)
+        
+        if not is_retryable or attempt == max_retries:
+            raise self._handle_groq_error(error)
+        
+        # calculate exponential backoff delay
+        base_delay = 1000  # 1 second base
+        exponential_delay = base_delay * (2 ** (attempt - 1))
+        jitter_delay = exponential_delay + random.randint(0, 1000)
+        delay_seconds = jitter_delay / 1000
+        
+        remaining = context.remaining() if context else None
+        if remaining is not None and remaining < delay_seconds:
+            # the retry couldn't finish in time anyway
+            raise context.deadline_error()
+        
+        print(f"Retrying in {delay_seconds:.1f}s... ({attempt}/{max_retries})")
+        await asyncio.sleep(delay_seconds)
+    
+    async def stream_content(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        route: Optional[RouteDecision] = None,
+        on_usage: Optional[Callable[[int], None]] = None
+    ) -> AsyncIterator[str]:
+        """Stream generated text as it arrives, continuing transparently if it hits the token limit"""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        output = ""
+        tokens = {"previous": 0}
+        call_messages = messages
+        
+        def record_usage(used: int) -> None:
+            if on_usage:
+                on_usage(tokens["previous"] + used)
+        
+        for continuation in range(self.config.maxContinuations + 1):
+            finish: dict = {}
+            # hold back the start of a continuation until we can tell whether it repeats our tail
+            head = "" if continuation else None
+            
+            # closed at once if our consumer stops early, releasing the admission slot and HTTP stream
+            async with aclosing(self._stream_once(call_messages, route, record_usage, finish)) as stream:
+                async for text in stream:
+                    if head is not None:
+                        head += text
+                        if len(head) < CONTINUATION_OVERLAP_CHARS:
+                            continue
+                        text, head = strip_overlap(output, head), None
+                    output += text
+                    yield text
+            
+            if head:
+                text = strip_overlap(output, head)
+                output += text
+                yield text
+            
+            tokens["previous"] += finish.get("tokens") or 0
+            if finish.get("reason") != "length" or continuation == self.config.maxContinuations:
+                return
+            
+            print(f"Stream truncated at {len(output)} chars, continuing ({continuation + 1}/{self.config.maxContinuations})...")
+            call_messages = messages + [{"role": "assistant", "content": output[-CONTINUATION_TAIL_CHARS:]}]
+    
+    async def _stream_once(
+        self,
+        messages: List[dict],
+        route: Optional[RouteDecision],
+        on_usage: Optional[Callable[[int], None]],
+        finish: dict
+    ) -> AsyncIterator[str]:
+        """Stream a single completion, retrying only before the first chunk"""
+        context = current_request_context()
+        max_retries = 3
+        
+        for attempt in range(1, max_retries + 1):
+            if context:
+                context.check_deadline()
+            
+            started = False
+            tokens_used = None
+            last_usage = None
+            streamed_content = []
+            streamed_reasoning = []
+            started_at = time.time()
+            try:
+                call_route = self.router.rekey(route, self.config) if route else self.router.route(self.config)
                 
-                if not is_retryable or attempt == max_retries:
+                # the slot is held for the whole stream, like a regular completion
+                with track_call(context, call_route.task, call_route.language) as call:
+                    async with self.admission.slot(
+                        self.config.apiKey,
+                        context.remaining() if context else None,
+                        context.priority if context else INTERACTIVE
+                    ):
+                        call["state"] = "running"
+                        stream = await self._send_completion(call_route, messages, stream=True)
+                        try:
+                            async for chunk in stream:
+                                if context:
+                                    context.check_deadline()
+                                
+                                usage = getattr(getattr(chunk, 'x_groq', None), 'usage', None) or getattr(chunk, 'usage', None)
+                                if usage:
+                                    last_usage = usage
+                                    tokens_used = usage.total_tokens
+                                    if on_usage:
+                                        on_usage(tokens_used)
+                                
+                                if chunk.choices and chunk.choices[0].finish_reason:
+                                    finish["reason"] = chunk.choices[0].finish_reason
+                                
+                                if chunk.choices and getattr(chunk.choices[0].delta, 'reasoning', None):
+                                    streamed_reasoning.append(chunk.choices[0].delta.reasoning)
+                                
+                                if chunk.choices and chunk.choices[0].delta.content:
+                                    if not started:
+                                        started = True
+                                        call["state"] = "streaming"
+                                    streamed_content.append(chunk.choices[0].delta.content)
+                                    yield chunk.choices[0].delta.content
+                        finally:
+                            # closes the HTTP response when the consumer stops early
+                            await stream.close()
+                    
+                finish["tokens"] = tokens_used
+                self._record_usage(
+                    call_route, last_usage, "".join(streamed_content), "".join(streamed_reasoning), started_at
+                )
+                if context:
+                    context.record_completed(tokens_used)
+                return
+            
+            except asyncio.CancelledError:
+                if context:
+                    context.record_cancelled(sum(len(message["content"]) for message in messages))
+                raise
+            
+            except AIAgentError as error:
+                raise error
+            
+            except Exception as error:
+                print(f"Groq API Error (stream attempt {attempt}/{max_retries}): {error}")
+                if started:
+                    # part of the output was already consumed, so a retry would duplicate it
                     raise self._handle_groq_error(error)
+                await self._backoff_or_raise(error, attempt, max_retries, context)
+    
+    async def _generate_validated(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        route: Optional[RouteDecision],
+        validator: TranslationValidator
+    ) -> tuple[str, Optional[int]]:
+        """Stream a completion, aborting and retrying at once when it clearly goes wrong"""
+        max_attempts = self.config.validationRetries + 1
+        probe_chars = VALIDATION_PROBE_CHARS
+        total_tokens = 0
+        output = ""
+        
+        for attempt in range(1, max_attempts + 1):
+            output = ""
+            reason = None
+            tokens = {"used": 0}
+            next_probe = probe_chars
+            
+            stream = self.stream_content(
+                prompt, system_prompt, route, on_usage=lambda used: tokens.update(used=used)
+            )
+            try:
+                async for text in stream:
+                    output += text
+                    # probe every few hundred characters rather than on every chunk; the last
+                    # attempt has nothing to retry with, so it always runs to completion
+                    if attempt < max_attempts and len(output) >= next_probe:
+                        next_probe += probe_chars
+                        reason = validator.check(output)
+                        if reason:
+                            break
+            finally:
+                await stream.aclose()
+            
+            if reason:
+                # an aborted stream never reports usage, but the prompt and what streamed were still billed
+                total_tokens += (len(prompt) + len(system_prompt or "") + len(output)) // 4
+            else:
+                total_tokens += tokens["used"]
+                reason = validator.check(output, final=True)
+            if not reason:
+                break
+            
+            print(f"Translation rejected ({reason}) on attempt {attempt}/{max_attempts}, "
+                  f"{'retrying' if attempt < max_attempts else 'keeping last output'}")
+        
+        content = await self.postprocessor.run(remove_thinking_blocks, output)
+        return content, total_tokens or None
+    
+    async def _create_completion(
+        self,
+        route: RouteDecision,
+        messages: List[dict],
+        context: Optional[RequestContext] = None
+    ):
+        """Send one completion request once admission control grants a slot"""
+        remaining = context.remaining() if context else None
+        
+        lane = context.priority if context else INTERACTIVE
+        
+        with track_call(context, route.task, route.language) as call:
+            async with self.admission.slot(self.config.apiKey, remaining, lane):
+                call["state"] = "running"
+                if not context or context.deadline is None:
+                    return await self._send_completion(route, messages)
                 
-                # calculate exponential backoff delay
-                base_delay = 1000  # 1 second base
-                exponential_delay = base_delay * (2 ** (attempt - 1))
-                jitter_delay = exponential_delay + random.randint(0, 1000)
-                delay_seconds = jitter_delay / 1000
-                
-                print(f"Retrying in {delay_seconds:.1f}s... ({attempt}/{max_retries})")
-                await asyncio.sleep(delay_seconds)
+                try:
+                    return await asyncio.wait_for(self._send_completion(route, messages), timeout=context.remaining())
+                except asyncio.TimeoutError:
+                    context.record_cancelled(sum(len(message["content"]) for message in messages))
+                    raise context.deadline_error()
+    
+    async def _send_completion(self, route: RouteDecision, messages: List[dict], stream: bool = False):
+        """Send the request and feed its rate-limit headers back to the router"""
+        response_headers = None
+        started_at = time.time()
         
-        raise self._handle_groq_error(last_error)
+        options, directive = reasoning_options(route.model, route.reasoningMode)
+        if directive:
+            messages = self._with_directive(messages, directive)
+        
+        # other workers share the key's limits, so take from its shared budget first
+        estimated_tokens = sum(len(message["content"]) for message in messages) // 2
+        await self.shared.throttle(route.apiKey, estimated_tokens, self.router.token_limit(route.apiKey))
+        
+        self.router.begin(route)
+        try:
+            raw_response = await self._client_for(route.apiKey).chat.completions.with_raw_response.create(
+                messages=messages,
+                model=route.model,
+                max_tokens=self.config.maxTokens,
+                temperature=self.config.temperature,
+                stream=stream,
+                **options
+            )
+            response_headers = raw_response.headers
+            completion = await raw_response.parse()
+            # for streams this is time to the response headers
+            get_upstream_health().record(time.time() - started_at)
+            
+            if not stream:
+                message = completion.choices[0].message
+                self._record_usage(
+                    route, completion.usage, message.content or "", getattr(message, 'reasoning', None) or "", started_at
+                )
+            return completion
+        except Exception as error:
+            # rate-limit errors carry the headers that tell us when the key frees up
+            response_headers = getattr(getattr(error, 'response', None), 'headers', None)
+            
+            get_upstream_health().record(
+                time.time() - started_at, getattr(error, 'status_code', None), failed=True
+            )
+            
+            context = current_request_context()
+            if context:
+                context.call_errors.append({
+                    "task": route.task,
+                    "language": route.language,
+                    "model": route.model,
+                    "latencyMs": int((time.time() - started_at) * 1000),
+                    "error": getattr(error, 'status_code', None) or type(error).__name__
+                })
+            raise error
+        finally:
+            self.router.finish(route, response_headers)
+    
+    def _with_directive(self, messages: List[dict], directive: str) -> List[dict]:
+        """Append a prompt directive (e.g. Qwen's /no_think) to the last user message"""
+        messages = [dict(message) for message in messages]
+        for message in reversed(messages):
+            if message["role"] == "user":
+                message["content"] = f"{message['content']}\n\n{directive}"
+                break
+        return messages
+    
+    def _record_usage(self, route: RouteDecision, usage, content: str, reasoning: str, started_at: float) -> None:
+        """Record visible versus total completion tokens for one call"""
+        completion_tokens = getattr(usage, 'completion_tokens', None)
+        visible_tokens = None
+        
+        if completion_tokens is not None:
+            details = getattr(usage, 'completion_tokens_details', None)
+            reasoning_tokens = getattr(details, 'reasoning_tokens', None)
+            
+            if reasoning_tokens is not None:
+                visible_tokens = completion_tokens - reasoning_tokens
+            else:
+                # no breakdown from the API, so split by characters of visible text vs thinking
+                visible_text, thinking_chars = split_reasoning(content)
+                thinking_chars += len(reasoning)
+                total_chars = len(visible_text) + thinking_chars
+                visible_tokens = round(completion_tokens * len(visible_text) / total_chars) if total_chars else completion_tokens
+        
+        call_usage = CallUsage(
+            task=route.task,
+            language=route.language,
+            model=route.model,
+            reasoningMode=route.reasoningMode,
+            promptTokens=getattr(usage, 'prompt_tokens', None),
+            completionTokens=completion_tokens,
+            visibleTokens=visible_tokens,
+            latencyMs=int((time.time() - started_at) * 1000)
+        )
+        
+        stats = REASONING_STATS.setdefault(route.reasoningMode, {"calls": 0, "completionTokens": 0, "visibleTokens": 0})
+        stats["calls"] += 1
+        stats["completionTokens"] += completion_tokens or 0
+        stats["visibleTokens"] += visible_tokens or 0
+        
+        if route.task == "translation" and route.language and route.contentLength:
+            get_latency_model().observe(
+                route.language, route.contentLength, call_usage.latencyMs / 1000, completion_tokens
+            )
+        
+        context = current_request_context()
+        if context:
+            context.call_usage.append(call_usage)
+    
+    def _client_for(self, api_key: str) -> AsyncGroq:
+        """Get the shared client for an API key"""
+        return get_groq_client(api_key)
     
     async def translate_content(
         self,
@@ -84,8 +556,12 @@ class GroqService:
 
         Remember: Output ONLY the translation. No explanations or commentary."""
 
+        route = self.router.route(
+            self.config, task="translation", language=target_language, content_length=len(content)
+        )
+        
         try:
-            translated_content, _ = await self.generate_content(translation_prompt)
+            translated_content, _ = await self.generate_content(translation_prompt, route=route)
             return translated_content
         except Exception as error:
             print(f"Translation Error ({source_language} -> {target_language}): {error}")
@@ -95,20 +571,253 @@ class GroqService:
         self,
         content: str,
         target_languages: List[str],
-        source_language: str = "en"
+        source_language: str = "en",
+        chunked: Optional[bool] = None,
+        content_type: Optional[str] = None
     ) -> tuple[List[Dict[str, str]], Optional[int]]:
         """Generate multiple translations in parallel"""
         total_tokens = 0
         
+        if chunked is None:
+            chunked = self.config.chunkedTranslation == "always"
+        
+        chunks = split_into_chunks(content, self.config.chunkMaxChars or 1500) if chunked else [content]
+        
+        async def translate_chunk(lang: str, index: int) -> str:
+            nonlocal total_tokens
+            
+            context_before = chunks[index - 1] if index > 0 else None
+            context_after = chunks[index + 1] if index + 1 < len(chunks) else None
+            translated_content, tokens = await self.translate_segment(
+                chunks[index], lang, source_language, context_before, context_after, content_type
+            )
+            if tokens:
+                total_tokens += tokens
+            return translated_content
+        
         async def translate_single(lang: str) -> Dict[str, str]:
             nonlocal total_tokens
             
-            system_prompt = "You are a professional translation tool. Your job is to translate ALL content completely from start to finish. Use all available tokens to ensure the translation is complete. Output only the translated text with no explanations or commentary."
+            if self.memory:
+                recalled = await self._translate_from_memory(content, lang, source_language, content_type)
+                if recalled:
+                    translated_content, tokens = recalled
+                    total_tokens += tokens or 0
+                    return {"language": lang, "content": translated_content}
+            
+            if len(chunks) == 1:
+                translated_content = await translate_chunk(lang, 0)
+            else:
+                # chunks run concurrently, so latency follows the longest chunk
+                translated_chunks = await gather_cancelling(
+                    *[translate_chunk(lang, index) for index in range(len(chunks))]
+                )
+                translated_content = "\n\n".join(chunk.strip() for chunk in translated_chunks)
+            
+            if self.memory:
+                self.memory.learn(
+                    self.memory.scope_for(self.config.apiKey), source_language, lang, content, translated_content
+                )
+            return {"language": lang, "content": translated_content}
+        
+        try:
+            # start the slowest languages first so they don't end up last in the admission queue
+            ordered = get_latency_model().order(target_languages, max(len(chunk) for chunk in chunks))
+            translated = await gather_cancelling(*[translate_single(lang) for lang in ordered])
+            
+            # respond in the order the client asked for
+            results_by_language = {result["language"]: result for result in translated}
+            results = [results_by_language[lang] for lang in target_languages]
+            return results, total_tokens if total_tokens > 0 else None
+        except Exception as error:
+            print(f"Batch translation error: {error}")
+            raise error
+    
+    async def translate_segment(
+        self,
+        content: str,
+        target_language: str,
+        source_language: str = "en",
+        context_before: Optional[str] = None,
+        context_after: Optional[str] = None,
+        content_type: Optional[str] = None
+    ) -> tuple[str, Optional[int]]:
+        """Translate one segment of a document, using neighbouring text as context only"""
+        if context_before:
+            context_before = context_before[-CHUNK_CONTEXT_CHARS:]
+        if context_after:
+            context_after = context_after[:CHUNK_CONTEXT_CHARS]
+        
+        user_prompt = self._build_translation_prompt(
+            content, target_language, source_language, context_before, context_after
+        )
+        route = self.router.route(
+            self.config,
+            task="translation",
+            language=target_language,
+            content_type=content_type,
+            content_length=len(content)
+        )
+        tokens = {"used": None}
+        batchable = self.batcher is not None and self.batcher.accepts(content, context_before, context_after)
+        
+        async def produce() -> tuple[str, bool]:
+            if batchable:
+                # short segments into the same language share one call with other requests' segments
+                batched = await self.batcher.translate(self, route, content, source_language)
+                if batched is not None:
+                    translated, tokens["used"] = batched
+                    return translated, True
+            
+            if self.config.validateTranslations:
+                validator = TranslationValidator(content, target_language, source_language)
+                translated, tokens["used"] = await self._generate_validated(
+                    user_prompt, TRANSLATION_SYSTEM_PROMPT, route, validator
+                )
+                # don't share an output that was kept only because retries ran out
+                return translated, validator.last_reason is None
             
-            user_prompt = f"""TRANSLATE THIS COMPLETE CONTENT FROM {source_language.upper()} TO {lang.upper()}:
+            translated, tokens["used"] = await self.generate_content(user_prompt, TRANSLATION_SYSTEM_PROMPT, route=route)
+            return translated, True
+        
+        # identical segments are translated once across requests and workers, never across API keys
+        translated, _ = await self.shared.cached(
+            {
+                "tenant": hash_text(self.config.apiKey),
+                "prompt": user_prompt,
+                "model": route.model,
+                "reasoningMode": route.reasoningMode,
+                "validated": self.config.validateTranslations
+            },
+            produce
+        )
+        return translated, tokens["used"]
+    
+    async def translate_segment_with_memory(
+        self,
+        content: str,
+        target_language: str,
+        source_language: str = "en",
+        context_before: Optional[str] = None,
+        content_type: Optional[str] = None
+    ) -> tuple[str, Optional[int]]:
+        """translate_segment that reuses remembered paragraphs and remembers the result"""
+        memory = self.memory
+        if not memory:
+            return await self.translate_segment(content, target_language, source_language, context_before, None, content_type)
+        
+        recalled = await self._translate_from_memory(content, target_language, source_language, content_type)
+        if recalled:
+            return recalled
+        translated, tokens = await self.translate_segment(
+            content, target_language, source_language, context_before, None, content_type
+        )
+        memory.learn(memory.scope_for(self.config.apiKey), source_language, target_language, content, translated)
+        return translated, tokens
+    
+    async def _translate_from_memory(
+        self,
+        content: str,
+        target_language: str,
+        source_language: str,
+        content_type: Optional[str] = None
+    ) -> Optional[tuple[str, Optional[int]]]:
+        """Reuse remembered paragraphs and translate only the rest; None if no paragraph matched"""
+        scope = self.memory.scope_for(self.config.apiKey)
+        paragraphs = split_paragraphs(content)
+        matches = [self.memory.lookup(scope, source_language, target_language, paragraph) for paragraph in paragraphs]
+        if not any(matches):
+            return None
+        
+        tokens = {"used": 0}
+        
+        # consecutive unmatched paragraphs go out as one segment, with their neighbours as context
+        runs = []
+        for index, match in enumerate(matches):
+            if match is None:
+                if runs and runs[-1][1] == index:
+                    runs[-1][1] = index + 1
+                else:
+                    runs.append([index, index + 1])
+        
+        async def translate_run(start: int, end: int) -> str:
+            segment = "\n\n".join(paragraphs[start:end])
+            translated, used = await self.translate_segment(
+                segment,
+                target_language,
+                source_language,
+                paragraphs[start - 1] if start > 0 else None,
+                paragraphs[end] if end < len(paragraphs) else None,
+                content_type
+            )
+            tokens["used"] += used or 0
+            self.memory.learn(scope, source_language, target_language, segment, translated)
+            return translated.strip()
+        
+        async def reuse(index: int) -> str:
+            match = matches[index]
+            if match.exact or not self.memory.adapt:
+                return match.translation
+            adapted, used = await self._adapt_translation(match, paragraphs[index], target_language, source_language)
+            tokens["used"] += used or 0
+            self.memory.adapted += 1
+            self.memory.learn(scope, source_language, target_language, paragraphs[index], adapted)
+            return adapted.strip()
+        
+        reused = [index for index, match in enumerate(matches) if match is not None]
+        translated = await gather_cancelling(
+            *[translate_run(start, end) for start, end in runs],
+            *[reuse(index) for index in reused]
+        )
+        
+        parts: Dict[int, str] = dict(zip([start for start, _ in runs] + reused, translated))
+        content_parts = [parts[index] for index in sorted(parts)]
+        print(f"Translation memory: reused {len(reused)}/{len(paragraphs)} paragraphs for {target_language}")
+        return "\n\n".join(content_parts), tokens["used"] or None
+    
+    async def _adapt_translation(
+        self,
+        match: MemoryMatch,
+        segment: str,
+        target_language: str,
+        source_language: str
+    ) -> tuple[str, Optional[int]]:
+        """Edit a remembered translation of similar text to fit the new text, instead of translating afresh"""
+        user_prompt = f"""UPDATE THIS {target_language.upper()} TRANSLATION SO IT MATCHES THE REVISED {source_language.upper()} TEXT:
 
-            {content}
+            Previous text: {match.source}
+            Previous translation: {match.translation}
+            Revised text: {segment}
+
+            Change only what the revision changed and keep the rest of the translation word for word.
+            Output ONLY the updated translation with no explanations."""
+        
+        route = self.router.route(
+            self.config, task="translation", language=target_language, content_length=len(segment)
+        )
+        return await self.generate_content(user_prompt, TRANSLATION_SYSTEM_PROMPT, route=route)
+    
+    def _build_translation_prompt(
+        self,
+        content: str,
+        target_language: str,
+        source_language: str,
+        context_before: Optional[str] = None,
+        context_after: Optional[str] = None
+    ) -> str:
+        """Build the user prompt for translating content or a single chunk of it"""
+        context_section = ""
+        if context_before or context_after:
+            context_section = f"""
+            SURROUNDING CONTEXT (for reference only - do NOT translate or output it):
+            Before: {context_before or "(start of document)"}
+            After: {context_after or "(end of document)"}
+"""
+        
+        return f"""TRANSLATE THIS COMPLETE CONTENT FROM {source_language.upper()} TO {target_language.upper()}:
 
+            {content}
+{context_section}
             CRITICAL REQUIREMENTS:
             1. TRANSLATE THE ENTIRE CONTENT - Do not stop midway
             2. Output ONLY the translated text with no explanations
@@ -119,20 +828,6 @@ class GroqService:
             7. Use all necessary tokens to finish the translation
 
             TRANSLATE EVERYTHING - START NOW:"""
-
-            translated_content, tokens = await self.generate_content(user_prompt, system_prompt)
-            if tokens:
-                total_tokens += tokens
-            return {"language": lang, "content": translated_content}
-        
-        try:
-            # create tasks for parallel translation
-            tasks = [translate_single(lang) for lang in target_languages]
-            results = await asyncio.gather(*tasks)
-            return results, total_tokens if total_tokens > 0 else None
-        except Exception as error:
-            print(f"Batch translation error: {error}")
-            raise error
     
     def _handle_groq_error(self, error: Exception) -> AIAgentError:
         """Handle and categorize Groq API errors"""
@@ -175,7 +870,8 @@ class GroqService:
     async def test_connection(self) -> bool:
         """Test the API connection"""
         try:
-            _, _ = await self.generate_content('Say "Hello" in one word.')
+            # listing models checks the key and connection without spending tokens
+            await self._client_for(self.config.apiKey).models.list()
             return True
         except Exception as error:
             print(f"Connection test failed: {error}")
@@ -0,0 +1,139 @@
+from typing import Dict, List, Optional
+from .types import get_language_by_code
+
+
+# completion tokens per character of (English) source text, by output script, before we have data
+SCRIPT_TOKEN_PRIORS: Dict[str, float] = {
+    "Latin": 0.32,
+    "Cyrillic": 0.5,
+    "Greek": 0.6,
+    "Arabic": 0.55,
+    "Hebrew": 0.55,
+    "Armenian": 0.8,
+    "Georgian": 0.9,
+    "Han": 0.4,
+    "Japanese": 0.5,
+    "Hangul": 0.55,
+    "Devanagari": 0.9,
+    "Bengali": 1.0,
+    "Gurmukhi": 1.0,
+    "Gujarati": 1.0,
+    "Oriya": 1.2,
+    "Tamil": 1.2,
+    "Telugu": 1.2,
+    "Kannada": 1.2,
+    "Malayalam": 1.3,
+    "Sinhala": 1.3,
+    "Thai": 0.9,
+    "Lao": 1.2,
+    "Myanmar": 1.4,
+    "Khmer": 1.4,
+}
+
+# output speed used with the priors until real calls have been observed
+PRIOR_TOKENS_PER_SECOND = 400.0
+
+# observations before a language's own numbers are trusted over its family's
+MIN_SAMPLES = 3
+
+# contents shorter than this are dominated by fixed per-call overhead
+MIN_CONTENT_CHARS = 200
+
+
+class LatencyStats:
+    """Moving averages of seconds and completion tokens per source character"""
+
+    def __init__(self, seconds_per_char: float, tokens_per_char: float, alpha: float = 0.2):
+        self.seconds_per_char = seconds_per_char
+        self.tokens_per_char = tokens_per_char
+        self.alpha = alpha
+        self.samples = 0
+
+    def update(self, seconds_per_char: float, tokens_per_char: Optional[float]) -> None:
+        # the first real sample replaces the prior outright
+        weight = 1.0 if self.samples == 0 else self.alpha
+        self.seconds_per_char += weight * (seconds_per_char - self.seconds_per_char)
+        if tokens_per_char is not None:
+            self.tokens_per_char += weight * (tokens_per_char - self.tokens_per_char)
+        self.samples += 1
+
+
+class LatencyModel:
+    """Per-language translation latency estimates learned from completed calls"""
+
+    def __init__(self):
+        self.languages: Dict[str, LatencyStats] = {}
+        self.families: Dict[str, LatencyStats] = {}
+
+    def observe(
+        self,
+        language: str,
+        content_chars: int,
+        latency_seconds: float,
+        completion_tokens: Optional[int] = None
+    ) -> None:
+        """Record a finished translation call of content_chars source characters"""
+        chars = max(content_chars, MIN_CONTENT_CHARS)
+        seconds_per_char = latency_seconds / chars
+        tokens_per_char = completion_tokens / chars if completion_tokens else None
+
+        self._stats(self.languages, language, language).update(seconds_per_char, tokens_per_char)
+        family = self._family(language)
+        if family:
+            self._stats(self.families, family, language).update(seconds_per_char, tokens_per_char)
+
+    def estimate(self, language: str, content_chars: int) -> float:
+        """Expected seconds to translate content_chars characters into language"""
+        chars = max(content_chars, MIN_CONTENT_CHARS)
+        stats = self.languages.get(language)
+        if stats is None or stats.samples < MIN_SAMPLES:
+            family = self.families.get(self._family(language) or "")
+            # a family average shifted by this language's own script prior
+            if family is not None and family.samples >= MIN_SAMPLES:
+                scale = prior_tokens_per_char(language) / max(family.tokens_per_char, 1e-6)
+                return chars * family.seconds_per_char * min(max(scale, 0.5), 2.0)
+        if stats is None:
+            return chars * prior_tokens_per_char(language) / PRIOR_TOKENS_PER_SECOND
+        return chars * stats.seconds_per_char
+
+    def order(self, languages: List[str], content_chars: int) -> List[str]:
+        """Languages sorted longest-expected-first, so the slowest start before the cap fills up"""
+        return sorted(languages, key=lambda language: self.estimate(language, content_chars), reverse=True)
+
+    def stats(self) -> dict:
+        """Learned per-language rates, for the metrics endpoint"""
+        return {
+            language: {
+                "samples": stats.samples,
+                "msPerKChar": round(stats.seconds_per_char * 1_000_000),
+                "tokensPerChar": round(stats.tokens_per_char, 3)
+            }
+            for language, stats in sorted(self.languages.items())
+        }
+
+    def _stats(self, table: Dict[str, LatencyStats], key: str, language: str) -> LatencyStats:
+        if key not in table:
+            tokens_per_char = prior_tokens_per_char(language)
+            table[key] = LatencyStats(tokens_per_char / PRIOR_TOKENS_PER_SECOND, tokens_per_char)
+        return table[key]
+
+    def _family(self, language: str) -> Optional[str]:
+        found = get_language_by_code(language)
+        return found.family if found else None
+
+
+def prior_tokens_per_char(language: str) -> float:
+    """Completion tokens per source character expected from the language's script"""
+    found = get_language_by_code(language)
+    return SCRIPT_TOKEN_PRIORS.get(found.script if found else "Latin", SCRIPT_TOKEN_PRIORS["Latin"])
+
+
+_model: Optional[LatencyModel] = None
+
+
+def get_latency_model() -> LatencyModel:
+    """Get the process-wide latency model"""
+    global _model
+    if _model is None:
+        _model = LatencyModel()
+    return _model
@@ -0,0 +1,275 @@
+import asyncio
+import os
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, List, Optional, Union
+from .ai_agent import AIAgent
+from .admission import BULK
+from .groq_service import close_groq_clients
+from .request_context import RequestContext, gather_cancelling, set_request_context, reset_request_context
+from .types import GeneratedContent, GenerationRequest, GenerationResponse, GroqConfig, AIAgentError
+
+
+class Linguist:
+    """In-process entry point to the backend, without going through HTTP
+
+    Calls share the server's process-wide client pool, admission control,
+    rate limits and translation cache, so embedding this alongside (or
+    instead of) the server gets the same concurrency control. Use one event
+    loop per process; SyncLinguist runs one in a background thread.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        priority: str = BULK,
+        deadline_seconds: Optional[float] = None,
+        config: Optional[GroqConfig] = None
+    ):
+        from . import create_groq_config
+
+        api_key = api_key or os.getenv('GROQ_API_KEY')
+        if not config and not api_key:
+            raise AIAgentError("VALIDATION_ERROR", "A Groq API key is required (or set GROQ_API_KEY)")
+
+        self.config = config or create_groq_config(api_key)
+        self.priority = priority
+        self.deadline_seconds = deadline_seconds
+        self.agent = AIAgent(self.config)
+
+    async def generate_multilingual_content(
+        self,
+        request: Union[GenerationRequest, dict]
+    ) -> GenerationResponse:
+        """Generate the original and all its translations, like POST /api/generate"""
+        request = _as_request(request)
+        return await self._spawn(self.agent.generate_multilingual_content(request))
+
+    async def add_languages(self, session_id: str, target_languages: List[str]) -> GenerationResponse:
+        """Add languages to an earlier generation by its sessionId, like POST /api/sessions/{id}/languages"""
+        return await self._spawn(self.agent.add_languages(session_id, target_languages))
+
+    async def translate_content(
+        self,
+        content: str,
+        target_languages: List[str],
+        source_language: str = "en"
+    ) -> List[dict]:
+        """Translate existing content into several languages"""
+        return await self._spawn(self.agent.translate_content(content, target_languages, source_language))
+
+    async def generate_batch(
+        self,
+        requests: List[Union[GenerationRequest, dict]],
+        return_exceptions: bool = False
+    ) -> List[Union[GenerationResponse, Exception]]:
+        """Run many generations concurrently, each with its own deadline and usage"""
+        calls = [self.generate_multilingual_content(request) for request in requests]
+        if return_exceptions:
+            return await asyncio.gather(*calls, return_exceptions=True)
+        return await gather_cancelling(*calls)
+
+    async def translate_batch(
+        self,
+        contents: List[str],
+        target_languages: List[str],
+        source_language: str = "en",
+        return_exceptions: bool = False
+    ) -> List[Union[List[dict], Exception]]:
+        """Translate many documents into the same languages concurrently"""
+        calls = [self.translate_content(content, target_languages, source_language) for content in contents]
+        if return_exceptions:
+            return await asyncio.gather(*calls, return_exceptions=True)
+        return await gather_cancelling(*calls)
+
+    async def stream_multilingual_content(
+        self,
+        request: Union[GenerationRequest, dict]
+    ) -> AsyncIterator[GeneratedContent]:
+        """Yield the original as soon as it's written, then each translation as it finishes"""
+        request = _as_request(request)
+        async for item in self._stream(lambda: self.agent.stream_multilingual_content(request)):
+            yield item
+
+    async def stream_translations(
+        self,
+        content: str,
+        target_languages: List[str],
+        source_language: str = "en"
+    ) -> AsyncIterator[dict]:
+        """Yield each translation of content as soon as it finishes"""
+        async def translations() -> AsyncIterator[dict]:
+            tasks = [
+                asyncio.create_task(self.agent.translate_content(content, [language], source_language))
+                for language in target_languages
+            ]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    results = await next_done
+                    yield results[0]
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        async for item in self._stream(translations):
+            yield item
+
+    async def aclose(self) -> None:
+        """Close the pooled upstream connections on this event loop"""
+        await close_groq_clients()
+
+    async def __aenter__(self) -> "Linguist":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def _spawn(self, coro: Awaitable) -> "asyncio.Task":
+        """Run coro as a task with its own request context, like one HTTP request"""
+        context = RequestContext(self.deadline_seconds, self.priority, "linguist")
+        token = set_request_context(context)
+        try:
+            task = asyncio.ensure_future(coro)
+        finally:
+            reset_request_context(token)
+        task.add_done_callback(lambda _: context.finish())
+        return task
+
+    async def _stream(self, make_iterator: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Drive an iterator in its own task so its request context never leaks into the caller's"""
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def produce() -> None:
+            try:
+                async for item in make_iterator():
+                    await queue.put(("item", item))
+                await queue.put(("done", None))
+            except Exception as error:
+                await queue.put(("error", error))
+
+        producer = self._spawn(produce())
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == "error":
+                    raise value
+                if kind == "done":
+                    return
+                yield value
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+
+class SyncLinguist:
+    """Blocking wrapper around Linguist for code that doesn't run an event loop
+
+    Every instance runs its calls on one long-lived loop in a shared
+    background thread, so clients and queues are shared across calls,
+    instances and the threads using them.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        priority: str = BULK,
+        deadline_seconds: Optional[float] = None,
+        config: Optional[GroqConfig] = None
+    ):
+        self.linguist = Linguist(api_key, priority, deadline_seconds, config)
+        self._loop = _acquire_background_loop()
+        self._closed = False
+
+    def generate_multilingual_content(self, request: Union[GenerationRequest, dict]) -> GenerationResponse:
+        return self._call(self.linguist.generate_multilingual_content(request))
+
+    def add_languages(self, session_id: str, target_languages: List[str]) -> GenerationResponse:
+        return self._call(self.linguist.add_languages(session_id, target_languages))
+
+    def translate_content(self, content: str, target_languages: List[str], source_language: str = "en") -> List[dict]:
+        return self._call(self.linguist.translate_content(content, target_languages, source_language))
+
+    def generate_batch(
+        self,
+        requests: List[Union[GenerationRequest, dict]],
+        return_exceptions: bool = False
+    ) -> List[Union[GenerationResponse, Exception]]:
+        return self._call(self.linguist.generate_batch(requests, return_exceptions))
+
+    def translate_batch(
+        self,
+        contents: List[str],
+        target_languages: List[str],
+        source_language: str = "en",
+        return_exceptions: bool = False
+    ) -> List[Union[List[dict], Exception]]:
+        return self._call(self.linguist.translate_batch(contents, target_languages, source_language, return_exceptions))
+
+    def stream_multilingual_content(self, request: Union[GenerationRequest, dict]) -> Iterator[GeneratedContent]:
+        return self._iterate(self.linguist.stream_multilingual_content(request))
+
+    def stream_translations(self, content: str, target_languages: List[str], source_language: str = "en") -> Iterator[dict]:
+        return self._iterate(self.linguist.stream_translations(content, target_languages, source_language))
+
+    def close(self) -> None:
+        """Release the background loop; the last open instance also closes the pooled connections"""
+        if self._closed:
+            return
+        self._closed = True
+        # the loop itself keeps running for the next instance
+        _release_background_loop(lambda: self._call(self.linguist.aclose()))
+
+    def __enter__(self) -> "SyncLinguist":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _call(self, coro: Awaitable) -> Any:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _iterate(self, iterator: AsyncIterator[Any]) -> Iterator[Any]:
+        async def next_item() -> Any:
+            return await iterator.__anext__()
+
+        try:
+            while True:
+                try:
+                    yield self._call(next_item())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._call(iterator.aclose())
+
+
+def _as_request(request: Union[GenerationRequest, dict]) -> GenerationRequest:
+    return request if isinstance(request, GenerationRequest) else GenerationRequest(**request)
+
+
+# one loop and thread for every SyncLinguist in the process, started on first use
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_users = 0
+_background_lock = threading.Lock()
+
+
+def _acquire_background_loop() -> asyncio.AbstractEventLoop:
+    global _background_loop, _background_users
+    with _background_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="linguist-loop", daemon=True).start()
+        _background_users += 1
+        return _background_loop
+
+
+def _release_background_loop(on_last: Callable[[], None]) -> None:
+    """Drop one user of the background loop, running on_last if it was the last one
+
+    on_last runs under the lock, so no new instance starts using pooled
+    clients while they're being closed.
+    """
+    global _background_users
+    with _background_lock:
+        _background_users = max(0, _background_users - 1)
+        if _background_users == 0:
+            on_last()
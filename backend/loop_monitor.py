@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, List, Optional
+
+
+# histogram bucket upper bounds for scheduling delay, in milliseconds
+LAG_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+
+# slow callbacks kept for the metrics endpoint
+MAX_SLOW_CALLBACKS = 20
+
+ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+# how asyncio and uvloop word the warning in debug mode when a callback runs past slow_callback_duration
+SLOW_CALLBACK_PATTERN = re.compile(r"^Executing %[rs] took %\.3f seconds$")
+
+
+class LoopMonitor:
+    """Samples event-loop scheduling delay and reports callbacks that block the loop
+
+    A ticker task measures how late a short sleep wakes up. Every callback
+    the loop runs is timed; a watchdog thread grabs the loop thread's stack
+    while a callback is still running past the threshold, so the report shows
+    where it was blocked rather than where it finished.
+
+    Callback timing relies on asyncio's own Handle. Loops that replace it,
+    like uvloop (which uvicorn picks when installed), fall back to the loop's
+    debug mode: slow callbacks are still counted, but without stacks, and
+    debug mode adds overhead of its own. Run uvicorn with --loop asyncio
+    for the full report.
+    """
+
+    def __init__(self, interval_seconds: float = 0.1, slow_callback_seconds: float = 0.1):
+        self.interval = interval_seconds
+        self.threshold = slow_callback_seconds
+        self.bucket_counts = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.lag_count = 0
+        self.lag_sum_ms = 0.0
+        self.lag_max_ms = 0.0
+        self.slow_callbacks: Deque[dict] = deque(maxlen=MAX_SLOW_CALLBACKS)
+        self.slow_callback_count = 0
+
+        self._ticker: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        # (handle, started at) of the callback running right now, set from the loop thread
+        self._current: Optional[tuple] = None
+        # (handle, stack) grabbed by the watchdog for an overrunning callback
+        self._captured: Optional[tuple] = None
+        self._original_run = None
+        self._debug_handler: Optional[logging.Handler] = None
+        self._debug_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        """Start sampling on the running loop"""
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if isinstance(loop, asyncio.BaseEventLoop):
+            self._install_timer()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+        else:
+            print(f"Loop monitor: {type(loop).__module__}.{type(loop).__name__} bypasses asyncio's callback handles, "
+                  f"timing slow callbacks through its debug mode without stacks (run uvicorn with --loop asyncio for them)")
+            self._install_debug_timer(loop)
+        self._ticker = loop.create_task(self._tick())
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._ticker:
+            self._ticker.cancel()
+        if self._original_run:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+        if self._debug_handler:
+            logging.getLogger("asyncio").removeHandler(self._debug_handler)
+            self._debug_handler = None
+        if self._debug_loop and not self._debug_loop.is_closed():
+            self._debug_loop.set_debug(False)
+            self._debug_loop = None
+
+    def observe_lag(self, lag_ms: float) -> None:
+        index = next((i for i, bound in enumerate(LAG_BUCKETS_MS) if lag_ms <= bound), len(LAG_BUCKETS_MS))
+        self.bucket_counts[index] += 1
+        self.lag_count += 1
+        self.lag_sum_ms += lag_ms
+        self.lag_max_ms = max(self.lag_max_ms, lag_ms)
+
+    def stats(self) -> dict:
+        """Lag histogram (cumulative, like Prometheus buckets) and recent slow callbacks"""
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip([str(bound) for bound in LAG_BUCKETS_MS] + ["+Inf"], self.bucket_counts):
+            cumulative += count
+            buckets[bound] = cumulative
+
+        return {
+            "lagMs": {
+                "buckets": buckets,
+                "count": self.lag_count,
+                "sum": round(self.lag_sum_ms, 1),
+                "max": round(self.lag_max_ms, 1)
+            },
+            "slowCallbackThresholdMs": int(self.threshold * 1000),
+            # "handle" with stacks, or "loop-debug" on loops that bypass asyncio's handles
+            "slowCallbackTiming": "loop-debug" if self._debug_handler else "handle",
+            "slowCallbacks": self.slow_callback_count,
+            "recentSlowCallbacks": list(self.slow_callbacks)
+        }
+
+    async def _tick(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.observe_lag(max(0.0, loop.time() - expected) * 1000)
+
+    def _install_timer(self) -> None:
+        """Time every callback the loop runs by wrapping Handle._run"""
+        original_run = asyncio.events.Handle._run
+        self._original_run = original_run
+        monitor = self
+
+        def timed_run(handle) -> None:
+            if threading.get_ident() != monitor._loop_thread_id:
+                return original_run(handle)
+
+            started = time.perf_counter()
+            monitor._current = (handle, started)
+            try:
+                return original_run(handle)
+            finally:
+                monitor._current = None
+                elapsed = time.perf_counter() - started
+                if elapsed >= monitor.threshold:
+                    monitor._report(handle, elapsed)
+
+        asyncio.events.Handle._run = timed_run
+
+    def _install_debug_timer(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Time callbacks with the loop's debug mode, reading its slow-callback warnings"""
+        self._debug_handler = _SlowCallbackHandler(self)
+        logging.getLogger("asyncio").addHandler(self._debug_handler)
+        self._debug_loop = loop
+        loop.slow_callback_duration = self.threshold
+        loop.set_debug(True)
+
+    def _watch(self) -> None:
+        """Capture the loop thread's stack while a callback is overrunning"""
+        while not self._stopped.wait(self.threshold / 2):
+            current = self._current
+            if current is None or (self._captured and self._captured[0] is current[0]):
+                continue
+            handle, started = current
+            if time.perf_counter() - started < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None and self._current is current:
+                # the loop's own frames are the same every time, so keep only the callback's
+                frames = [
+                    entry for entry in traceback.extract_stack(frame)
+                    if not entry.filename.startswith(ASYNCIO_DIR) and entry.filename != __file__
+                ]
+                self._captured = (handle, traceback.format_list(frames))
+
+    def _report(self, handle, elapsed: float) -> None:
+        captured, self._captured = self._captured, None
+        stack: Optional[List[str]] = captured[1] if captured and captured[0] is handle else None
+        self.slow_callback_count += 1
+
+        callback = getattr(handle, "_callback", None)
+        owner = getattr(callback, "__self__", None)
+        if isinstance(owner, asyncio.Task):
+            coro = owner.get_coro()
+            name = f"{owner.get_name()} {getattr(coro, '__qualname__', coro)}"
+        else:
+            name = str(handle)
+
+        self.slow_callbacks.append({
+            "at": round(time.time(), 3),
+            "durationMs": int(elapsed * 1000),
+            "callback": name,
+            "stack": [line.strip() for line in stack[-8:]] if stack else None
+        })
+        print(f"Slow event-loop callback: {name} blocked the loop for {int(elapsed * 1000)}ms")
+        if stack:
+            print("".join(stack[-8:]).rstrip())
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Turns the "Executing ... took ... seconds" warnings of a loop in debug mode into slow-callback reports"""
+
+    def __init__(self, monitor: LoopMonitor):
+        super().__init__(logging.WARNING)
+        self.monitor = monitor
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if SLOW_CALLBACK_PATTERN.match(str(record.msg)) and isinstance(record.args, tuple) and len(record.args) == 2:
+            handle, elapsed = record.args
+            self.monitor._report(handle, elapsed)
+
+
+_monitor: Optional[LoopMonitor] = None
+
+
+def get_loop_monitor() -> Optional[LoopMonitor]:
+    """Get the loop monitor if LOOP_MONITOR is enabled, otherwise None"""
+    global _monitor
+    if _monitor is None and os.getenv('LOOP_MONITOR', 'false').lower() in ('1', 'true', 'yes'):
+        _monitor = LoopMonitor(
+            interval_seconds=float(os.getenv('LOOP_MONITOR_INTERVAL_MS', '100')) / 1000,
+            slow_callback_seconds=float(os.getenv('SLOW_CALLBACK_MS', '100')) / 1000
+        )
+    return _monitor
@@ -0,0 +1,141 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _run_batch(func: Callable, batch: List[tuple]) -> List[Any]:
+    """Apply func to every argument tuple in one executor job"""
+    return [func(*args) for args in batch]
+
+
+def _warm_worker() -> int:
+    """Import and exercise the post-processing code inside a worker process"""
+    from .utils import create_generated_content, remove_thinking_blocks
+    create_generated_content("en", remove_thinking_blocks("<think>x</think>\n\n**Hello** _world_"))
+    return os.getpid()
+
+
+class PostProcessor:
+    """Runs CPU-bound text post-processing off the event loop when it's worth it
+
+    The server runs on processes: the regex work holds the GIL, so a thread
+    pool still stalls the loop (p50 lag in the tens of ms in
+    benchmarks/bench_postprocess.py) while a process pool keeps it near
+    zero. Embedded use (Linguist, SyncLinguist) defaults to threads, since
+    forkserver and spawn workers re-import the caller's main module and
+    break scripts without an if __name__ == "__main__" guard.
+    """
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        workers: int = 4,
+        inline_threshold: int = 4000,
+        batch_size: int = 16,
+        batch_window_ms: float = 2.0
+    ):
+        self.mode = mode
+        self.inline_threshold = inline_threshold
+        self.batch_size = batch_size
+        self.batch_window = batch_window_ms / 1000
+        self.executor: Optional[Executor] = None
+
+        if mode == "thread":
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="postprocess")
+        elif mode == "process":
+            # never fork: the pool is created from a running, multithreaded event loop
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method))
+
+        # large jobs waiting for their batch to be submitted, per function
+        self.pending: Dict[Callable, List[Tuple[tuple, asyncio.Future]]] = {}
+        self.inline_jobs = 0
+        self.offloaded_jobs = 0
+        self.batches = 0
+
+    async def run(self, func: Callable, *args) -> Any:
+        """Run func(*args), inline for small inputs and in the worker pool for large ones"""
+        size = sum(len(arg) for arg in args if isinstance(arg, str))
+        if self.executor is None or size < self.inline_threshold:
+            self.inline_jobs += 1
+            return func(*args)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self.pending.setdefault(func, [])
+        batch.append((args, future))
+
+        if len(batch) >= self.batch_size:
+            self._submit(func)
+        elif len(batch) == 1:
+            # give concurrent translations a moment to join the same executor job
+            loop.call_later(self.batch_window, self._submit, func)
+
+        return await future
+
+    def _submit(self, func: Callable) -> None:
+        batch = self.pending.pop(func, None)
+        if not batch:
+            return
+
+        self.batches += 1
+        self.offloaded_jobs += len(batch)
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(self.executor, _run_batch, func, [args for args, _ in batch])
+
+        def resolve(done: asyncio.Future) -> None:
+            error = done.exception() if not done.cancelled() else asyncio.CancelledError()
+            for index, (_, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(done.result()[index])
+
+        job.add_done_callback(resolve)
+
+    async def warm_up(self) -> None:
+        """Start every worker now rather than on the first large translation"""
+        if self.executor is None:
+            return
+        loop = asyncio.get_running_loop()
+        workers = getattr(self.executor, "_max_workers", 1)
+        await asyncio.gather(*[loop.run_in_executor(self.executor, _warm_worker) for _ in range(workers)])
+
+    def stats(self) -> dict:
+        """Counters for the metrics endpoint"""
+        return {
+            "mode": self.mode,
+            "inlineThreshold": self.inline_threshold,
+            "inlineJobs": self.inline_jobs,
+            "offloadedJobs": self.offloaded_jobs,
+            "batches": self.batches
+        }
+
+    def shutdown(self) -> None:
+        if self.executor:
+            self.executor.shutdown(wait=False)
+
+
+_postprocessor: Optional[PostProcessor] = None
+
+
+def get_postprocessor(default_mode: str = "thread") -> PostProcessor:
+    """Get the process-wide post-processor configured from the environment
+
+    default_mode applies when POSTPROCESS_EXECUTOR isn't set and only on the
+    first call; the server makes that call at startup with "process".
+    """
+    global _postprocessor
+    if _postprocessor is None:
+        _postprocessor = PostProcessor(
+            mode=os.getenv('POSTPROCESS_EXECUTOR', default_mode),
+            workers=int(os.getenv('POSTPROCESS_WORKERS', '4')),
+            inline_threshold=int(os.getenv('POSTPROCESS_INLINE_THRESHOLD', '4000')),
+            batch_size=int(os.getenv('POSTPROCESS_BATCH_SIZE', '16')),
+            batch_window_ms=float(os.getenv('POSTPROCESS_BATCH_WINDOW_MS', '2'))
+        )
+    return _postprocessor
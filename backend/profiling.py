@@ -0,0 +1,191 @@
+import asyncio
+import cProfile
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import List, Optional
+from .request_context import active_request_contexts
+
+
+# longest profile an admin can ask for; the worker keeps serving meanwhile
+MAX_PROFILE_SECONDS = 60
+
+# frames kept per allocation while tracemalloc is on for a memory diff
+TRACEMALLOC_FRAMES = 10
+
+# only one profile at a time: they share the loop thread and tracemalloc is global
+_profile_lock = asyncio.Lock()
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another is still running"""
+
+
+async def sample_cpu(seconds: float, interval: float = 0.005, all_threads: bool = False) -> str:
+    """Sample the event-loop thread's stack for a while, in collapsed-stack format
+
+    Each output line is "outer;...;inner count", the input flamegraph.pl and
+    speedscope expect. Sampling runs in a separate thread, so it sees time
+    spent in regex matching or JSON encoding on the loop, not just awaits.
+    """
+    loop_thread_id = threading.get_ident()
+    stacks: Counter = Counter()
+    stopped = threading.Event()
+
+    def sample() -> None:
+        own_thread_id = threading.get_ident()
+        while not stopped.wait(interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread_id or (not all_threads and thread_id != loop_thread_id):
+                    continue
+                stacks[_collapse(frame)] += 1
+
+    async with _exclusive():
+        sampler = threading.Thread(target=sample, name="cpu-sampler", daemon=True)
+        sampler.start()
+        try:
+            await asyncio.sleep(_clamp(seconds))
+        finally:
+            stopped.set()
+            await asyncio.to_thread(sampler.join)
+
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+async def profile_cpu_pstats(seconds: float) -> bytes:
+    """Deterministically profile the event-loop thread for a while, as a pstats file"""
+    async with _exclusive():
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(_clamp(seconds))
+        finally:
+            profiler.disable()
+
+    with tempfile.NamedTemporaryFile(suffix=".pstats", delete=False) as file:
+        path = file.name
+    try:
+        profiler.dump_stats(path)
+        with open(path, "rb") as file:
+            return file.read()
+    finally:
+        os.unlink(path)
+
+
+async def memory_diff(seconds: float, limit: int = 25) -> dict:
+    """Allocation growth over a window, by source line, from two tracemalloc snapshots"""
+    async with _exclusive():
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        try:
+            before = _snapshot()
+            await asyncio.sleep(_clamp(seconds))
+            after = _snapshot()
+            traced_current, traced_peak = tracemalloc.get_traced_memory()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+
+    differences = after.compare_to(before, "lineno")
+    return {
+        "seconds": _clamp(seconds),
+        # objects allocated before tracing started are invisible to the diff
+        "tracingStartedForThisProfile": started_here,
+        "tracedKiB": round(traced_current / 1024, 1),
+        "peakKiB": round(traced_peak / 1024, 1),
+        "top": [
+            {
+                "location": str(difference.traceback[0]) if difference.traceback else None,
+                "sizeDiffKiB": round(difference.size_diff / 1024, 1),
+                "sizeKiB": round(difference.size / 1024, 1),
+                "countDiff": difference.count_diff,
+                "count": difference.count
+            }
+            for difference in differences[:max(1, limit)]
+        ]
+    }
+
+
+def dump_requests() -> List[dict]:
+    """In-flight requests with the state of each language's upstream calls"""
+    now = time.monotonic()
+    dump = []
+    for context in active_request_contexts():
+        languages: dict = {}
+        for usage in context.call_usage:
+            if usage.language:
+                languages.setdefault(usage.language, {"done": 0, "failed": 0, "active": []})["done"] += 1
+        for error in context.call_errors:
+            if error.get("language"):
+                languages.setdefault(error["language"], {"done": 0, "failed": 0, "active": []})["failed"] += 1
+
+        active_calls = []
+        for call in list(context.active_calls.values()):
+            active_call = {
+                "task": call["task"],
+                "language": call["language"],
+                "state": call["state"],
+                "elapsedMs": int((now - call["startedAt"]) * 1000)
+            }
+            active_calls.append(active_call)
+            if call["language"]:
+                languages.setdefault(call["language"], {"done": 0, "failed": 0, "active": []})["active"].append(
+                    call["state"]
+                )
+
+        remaining = context.remaining()
+        dump.append({
+            "id": context.request_id,
+            "endpoint": context.endpoint,
+            "priority": context.priority,
+            "startedAt": round(context.wall_started_at, 3),
+            "elapsedMs": int((now - context.started_at) * 1000),
+            "remainingMs": int(remaining * 1000) if remaining is not None else None,
+            "completedCalls": context.completed_calls,
+            "cancelledCalls": context.cancelled_calls,
+            "activeCalls": sorted(active_calls, key=lambda call: call["elapsedMs"], reverse=True),
+            "languages": languages
+        })
+    return dump
+
+
+class _exclusive:
+    """Hold the profile lock, failing at once instead of queueing behind another profile"""
+
+    async def __aenter__(self) -> None:
+        if _profile_lock.locked():
+            raise ProfilerBusy("Another profile is already running")
+        await _profile_lock.acquire()
+
+    async def __aexit__(self, *exc_info) -> None:
+        _profile_lock.release()
+
+
+def _clamp(seconds: float) -> float:
+    return min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    """Snapshot without tracemalloc's and the import system's own allocations"""
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>")
+    ])
+
+
+def _collapse(frame) -> str:
+    """Stack as "file:function" entries, outermost first, so samples on different lines merge"""
+    entries: List[str] = []
+    current: Optional[object] = frame
+    while current is not None:
+        code = current.f_code
+        entries.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        current = current.f_back
+    return ";".join(reversed(entries))
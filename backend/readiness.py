@@ -0,0 +1,184 @@
+import asyncio
+import importlib
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from .postprocess import get_postprocessor
+from .translation_memory import get_translation_memory
+
+
+# upstream calls older than this no longer count towards readiness
+HEALTH_WINDOW_SECONDS = 300
+HEALTH_MAX_SAMPLES = 2000
+
+# modules the request handlers import lazily
+WARMUP_MODULES = [
+    "backend.ai_agent",
+    "backend.prompts",
+    "backend.utils",
+    "backend.validation",
+    "backend.linguist",
+]
+
+WARMUP_TEXT = """<think>plan the answer first</think>
+
+# Launch update
+
+Our new dashboard helps **teams** share _reports_ across time zones:
+
+- Faster onboarding for [new members](https://example.com)
+- Real-time `notifications` for every project
+
+Thanks for reading!"""
+
+
+class UpstreamHealth:
+    """Recent upstream call latencies and outcomes, for readiness and metrics"""
+
+    def __init__(self, window_seconds: float = HEALTH_WINDOW_SECONDS, max_samples: int = HEALTH_MAX_SAMPLES):
+        self.window_seconds = window_seconds
+        # (finished at, latency seconds, outcome) with outcome "ok", "rate_limited" or "error"
+        self.samples: Deque[Tuple[float, float, str]] = deque(maxlen=max_samples)
+
+    def record(self, latency_seconds: float, status_code: Optional[int] = None, failed: bool = False) -> None:
+        """Record one finished call; only 5xx, timeouts and connection failures count as errors"""
+        outcome = "ok"
+        if failed:
+            if status_code == 429:
+                outcome = "rate_limited"
+            elif status_code is None or status_code >= 500:
+                outcome = "error"
+        self.samples.append((time.monotonic(), latency_seconds, outcome))
+
+    def stats(self) -> dict:
+        cutoff = time.monotonic() - self.window_seconds
+        recent = [(latency, outcome) for finished_at, latency, outcome in self.samples if finished_at >= cutoff]
+        latencies = sorted(latency for latency, outcome in recent if outcome == "ok")
+        errors = sum(1 for _, outcome in recent if outcome == "error")
+        rate_limited = sum(1 for _, outcome in recent if outcome == "rate_limited")
+
+        return {
+            "windowSeconds": self.window_seconds,
+            "calls": len(recent),
+            "errorRate": round(errors / len(recent), 3) if recent else 0.0,
+            "rateLimitedRate": round(rate_limited / len(recent), 3) if recent else 0.0,
+            "latencyMs": {
+                "p50": round(latencies[len(latencies) // 2] * 1000) if latencies else None,
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000) if latencies else None
+            }
+        }
+
+
+class WarmUp:
+    """Startup warm-up steps and whether they have finished"""
+
+    def __init__(self):
+        self.ready = False
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.steps: Dict[str, int] = {}
+        self.errors: List[str] = []
+
+    async def run(self, upstream_keys: Optional[List[str]] = None) -> None:
+        """Preload modules, compile patterns, start workers, load the translation memory and open upstream connections"""
+        self.started_at = time.time()
+
+        await self._step("modules", self._import_modules)
+        await self._step("patterns", self._exercise_text_pipeline)
+        await self._step("workers", get_postprocessor().warm_up)
+        # the memory file loads in its own thread; wait for it here so /ready means it's in use
+        await self._step("memory", lambda: asyncio.to_thread(get_translation_memory, True))
+        if upstream_keys:
+            await self._step("upstream", lambda: self._open_connections(upstream_keys))
+
+        self.finished_at = time.time()
+        self.ready = True
+        print(f"Warm-up finished in {int((self.finished_at - self.started_at) * 1000)}ms {self.steps}")
+
+    async def _step(self, name: str, step) -> None:
+        started = time.monotonic()
+        try:
+            result = step()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as error:
+            # a failed step leaves that part cold but must not keep the worker out of rotation
+            self.errors.append(f"{name}: {error}")
+            print(f"Warm-up step {name} failed: {error}")
+        self.steps[name] = int((time.monotonic() - started) * 1000)
+
+    def _import_modules(self) -> None:
+        for module in WARMUP_MODULES:
+            importlib.import_module(module)
+
+    def _exercise_text_pipeline(self) -> None:
+        """Run each regex-heavy helper once so its patterns are compiled and cached"""
+        from .types import GenerationRequest
+        from .utils import (
+            create_generated_content,
+            diff_paragraphs,
+            remove_thinking_blocks,
+            split_into_chunks,
+            split_paragraphs,
+            StreamSegmenter
+        )
+        from .validation import TranslationValidator
+        from .prompts import generate_prompt
+
+        cleaned = remove_thinking_blocks(WARMUP_TEXT)
+        create_generated_content("en", cleaned)
+        split_into_chunks(cleaned, 80)
+        diff_paragraphs(split_paragraphs(cleaned), split_paragraphs(cleaned + "\n\nP.S."))
+
+        segmenter = StreamSegmenter(min_chars=40)
+        for index in range(0, len(WARMUP_TEXT), 16):
+            segmenter.feed(WARMUP_TEXT[index:index + 16])
+        segmenter.flush()
+
+        for language in ("fr", "ja"):
+            TranslationValidator(cleaned, language).check(cleaned, final=True)
+
+        request = GenerationRequest(prompt="Launch update", contentType="email", targetLanguages=["fr"])
+        generate_prompt(request.contentType, request.prompt, "professional", "medium")
+
+    async def _open_connections(self, api_keys: List[str]) -> None:
+        """Authenticate the configured keys with a models listing, which costs no tokens
+
+        Every key's client shares one connection pool, so the connections
+        opened here also serve requests made with users' own keys.
+        """
+        from .groq_service import get_groq_client
+
+        await asyncio.gather(*[
+            asyncio.wait_for(get_groq_client(api_key).models.list(), timeout=10)
+            for api_key in api_keys
+        ])
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "durationMs": int((self.finished_at - self.started_at) * 1000) if self.finished_at else None,
+            "steps": self.steps,
+            "errors": self.errors
+        }
+
+
+_health: Optional[UpstreamHealth] = None
+_warm_up: Optional[WarmUp] = None
+
+
+def get_upstream_health() -> UpstreamHealth:
+    """Get the process-wide upstream health tracker"""
+    global _health
+    if _health is None:
+        _health = UpstreamHealth(float(os.getenv('READINESS_WINDOW_SECONDS', str(HEALTH_WINDOW_SECONDS))))
+    return _health
+
+
+def get_warm_up() -> WarmUp:
+    """Get the process-wide warm-up state"""
+    global _warm_up
+    if _warm_up is None:
+        _warm_up = WarmUp()
+    return _warm_up
@@ -0,0 +1,150 @@
+import asyncio
+import itertools
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+from .types import AIAgentError
+
+
+class RequestContext:
+    """Deadline and cancellation bookkeeping for one API request"""
+
+    def __init__(
+        self,
+        deadline_seconds: Optional[float] = None,
+        priority: str = "interactive",
+        endpoint: Optional[str] = None
+    ):
+        self.request_id = next(_request_ids)
+        self.endpoint = endpoint
+        self.priority = priority
+        self.finished = False
+        self.started_at = time.monotonic()
+        self.wall_started_at = time.time()
+        self.deadline = self.started_at + deadline_seconds if deadline_seconds else None
+        self.completed_calls = 0
+        self.completed_tokens = 0
+        self.cancelled_calls = 0
+        self.tokens_saved = 0
+        # CallUsage records for every upstream call made on behalf of this request
+        self.call_usage: List = []
+        # upstream calls that failed: task, language, model, latency and error code
+        self.call_errors: List[dict] = []
+        # upstream calls in progress by call id: task, language, state (queued, running, streaming) and start time
+        self.active_calls: Dict[int, dict] = {}
+        _active_contexts.add(self)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None if there is no deadline"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check_deadline(self) -> None:
+        """Raise DEADLINE_EXCEEDED once the deadline has passed"""
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise self.deadline_error()
+
+    def deadline_error(self) -> AIAgentError:
+        return AIAgentError(
+            "DEADLINE_EXCEEDED",
+            "Request deadline exceeded before all content was generated.",
+            {"elapsedMs": int((time.monotonic() - self.started_at) * 1000)}
+        )
+
+    @contextmanager
+    def track_call(self, task: str, language: Optional[str]) -> Iterator[dict]:
+        """Track an upstream call for the in-flight request dump; callers update its state"""
+        call_id = next(_call_ids)
+        call = {"task": task, "language": language, "state": "queued", "startedAt": time.monotonic()}
+        self.active_calls[call_id] = call
+        try:
+            yield call
+        finally:
+            self.active_calls.pop(call_id, None)
+
+    def finish(self) -> None:
+        """Mark the request as done so it drops out of the in-flight dump"""
+        self.finished = True
+        _active_contexts.discard(self)
+
+    def record_completed(self, tokens: Optional[int]) -> None:
+        self.completed_calls += 1
+        self.completed_tokens += tokens or 0
+
+    def record_cancelled(self, prompt_chars: int) -> None:
+        """Count a call that was cancelled before it finished and estimate the tokens it would have used"""
+        if self.completed_calls and self.completed_tokens:
+            estimate = self.completed_tokens // self.completed_calls
+        else:
+            # roughly 4 characters per token, with output about as long as the prompt
+            estimate = prompt_chars // 2
+        self.cancelled_calls += 1
+        self.tokens_saved += estimate
+        CANCELLATION_STATS["cancelledCalls"] += 1
+        CANCELLATION_STATS["estimatedTokensSaved"] += estimate
+
+
+_request_ids = itertools.count(1)
+_call_ids = itertools.count(1)
+
+# requests still being worked on; weak so an abandoned context can't leak
+_active_contexts: "weakref.WeakSet[RequestContext]" = weakref.WeakSet()
+
+
+def active_request_contexts() -> List[RequestContext]:
+    """Contexts of requests that haven't finished yet, oldest first"""
+    return sorted(
+        (context for context in list(_active_contexts) if not context.finished),
+        key=lambda context: context.started_at
+    )
+
+
+# process-wide totals, exposed on /metrics
+CANCELLATION_STATS = {
+    "cancelledRequests": 0,
+    "cancelledCalls": 0,
+    "estimatedTokensSaved": 0
+}
+
+_current_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def current_request_context() -> Optional[RequestContext]:
+    """Get the context of the request being handled, if any"""
+    return _current_context.get()
+
+
+def set_request_context(context: Optional[RequestContext]):
+    """Set the request context; tasks created afterwards inherit it"""
+    return _current_context.set(context)
+
+
+def reset_request_context(token) -> None:
+    """Restore the context that was current before set_request_context"""
+    _current_context.reset(token)
+
+
+@contextmanager
+def track_call(context: Optional[RequestContext], task: str, language: Optional[str]) -> Iterator[dict]:
+    """RequestContext.track_call that also works outside a request"""
+    if context is None:
+        yield {}
+        return
+    with context.track_call(task, language) as call:
+        yield call
+
+
+async def gather_cancelling(*aws):
+    """Like asyncio.gather, but cancel the remaining tasks as soon as one fails"""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except Exception:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        raise
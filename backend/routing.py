@@ -0,0 +1,246 @@
+import os
+import re
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from .types import AIAgentError, GroqConfig, RouteDecision
+
+
+# per-request user keys are tracked too, so cap how many idle ones we remember
+MAX_TRACKED_KEYS = 1024
+
+# languages with plenty of training data that a smaller model translates well
+DEFAULT_FAST_LANGUAGES = "fr,es,de,pt,it,nl"
+
+
+class KeyState:
+    """Rate-limit headroom for one API key, updated from Groq response headers"""
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self.key_id = f"...{api_key[-4:]}" if len(api_key) > 4 else "key"
+        self.limit_requests: Optional[int] = None
+        self.remaining_requests: Optional[int] = None
+        self.limit_tokens: Optional[int] = None
+        self.remaining_tokens: Optional[int] = None
+        self.requests_reset_at = 0.0
+        self.tokens_reset_at = 0.0
+        self.in_flight = 0
+
+    def headroom(self) -> float:
+        """Fraction of the key's rate limit still available (1.0 when unknown)"""
+        now = time.monotonic()
+        fractions = [1.0]
+
+        if self.limit_requests and self.remaining_requests is not None and now < self.requests_reset_at:
+            fractions.append((self.remaining_requests - self.in_flight) / self.limit_requests)
+        if self.limit_tokens and self.remaining_tokens is not None and now < self.tokens_reset_at:
+            fractions.append(self.remaining_tokens / self.limit_tokens)
+
+        # calls that haven't reported back yet still count against the key
+        return min(fractions) - self.in_flight * 0.001
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Update limits from x-ratelimit-* response headers"""
+        now = time.monotonic()
+
+        self.limit_requests = _parse_int(headers.get("x-ratelimit-limit-requests"), self.limit_requests)
+        self.limit_tokens = _parse_int(headers.get("x-ratelimit-limit-tokens"), self.limit_tokens)
+        self.remaining_requests = _parse_int(headers.get("x-ratelimit-remaining-requests"), self.remaining_requests)
+        self.remaining_tokens = _parse_int(headers.get("x-ratelimit-remaining-tokens"), self.remaining_tokens)
+
+        if "x-ratelimit-reset-requests" in headers:
+            self.requests_reset_at = now + parse_reset_duration(headers["x-ratelimit-reset-requests"])
+        if "x-ratelimit-reset-tokens" in headers:
+            self.tokens_reset_at = now + parse_reset_duration(headers["x-ratelimit-reset-tokens"])
+
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            # a 429 means the key is exhausted until the server says otherwise
+            self.remaining_requests = 0
+            self.requests_reset_at = now + (_parse_float(retry_after) or 1.0)
+
+
+class ModelRouter:
+    """Routes each Groq call to an API key and model"""
+
+    def __init__(
+        self,
+        pool_keys: Optional[List[str]] = None,
+        fast_model: Optional[str] = None,
+        fast_languages: Optional[List[str]] = None,
+        fast_content_types: Optional[List[str]] = None,
+        fast_max_chars: int = 1500,
+        server_keys: Optional[List[str]] = None,
+        pool_for_user_keys: bool = False
+    ):
+        self.pool_keys = [key for key in (pool_keys or []) if key]
+        # requests on these (or no) keys are the server's own and may use the pool
+        self.server_keys = set(key for key in (server_keys or []) if key) | set(self.pool_keys)
+        # off by default: otherwise any caller with any key string could spend the pool's quota
+        self.pool_for_user_keys = pool_for_user_keys
+        self.fast_model = fast_model or None
+        self.fast_languages = set(fast_languages or [])
+        self.fast_content_types = set(fast_content_types or [])
+        self.fast_max_chars = fast_max_chars
+        self.keys: Dict[str, KeyState] = {}
+
+    def route(
+        self,
+        config: GroqConfig,
+        task: str = "generation",
+        language: Optional[str] = None,
+        content_type: Optional[str] = None,
+        content_length: int = 0
+    ) -> RouteDecision:
+        """Pick the model and the key with the most rate-limit headroom for a call"""
+        model = config.model
+
+        # original generation always stays on the configured model
+        if task == "translation" and self.fast_model:
+            short_content_type = content_type in self.fast_content_types and content_length <= self.fast_max_chars
+            if short_content_type or language in self.fast_languages:
+                model = self.fast_model
+
+        reasoning_mode = (config.translationReasoningMode if task == "translation" else config.reasoningMode) or "full"
+
+        best = self._best_key(config)
+        return RouteDecision(
+            apiKey=best.api_key,
+            model=model,
+            keyId=best.key_id,
+            task=task,
+            language=language,
+            reasoningMode=reasoning_mode,
+            contentLength=content_length
+        )
+
+    def rekey(self, route: RouteDecision, config: GroqConfig) -> RouteDecision:
+        """Keep a decision's model but move it to the key with the most headroom now"""
+        best = self._best_key(config)
+        return route.model_copy(update={"apiKey": best.api_key, "keyId": best.key_id})
+
+    def begin(self, route: RouteDecision) -> None:
+        """Mark a call as in flight on its key"""
+        self._state(route.apiKey).in_flight += 1
+
+    def finish(self, route: RouteDecision, headers: Optional[Mapping[str, str]] = None) -> None:
+        """Release an in-flight call and record the rate-limit headers it returned"""
+        state = self._state(route.apiKey)
+        state.in_flight = max(0, state.in_flight - 1)
+        if headers:
+            state.update(headers)
+
+    def token_limit(self, api_key: str) -> Optional[int]:
+        """Tokens-per-minute limit a key last reported in its headers, if known"""
+        state = self.keys.get(api_key)
+        return state.limit_tokens if state else None
+
+    def stats(self) -> dict:
+        """Current headroom per server and pool key; users' own keys only as totals
+
+        Metrics are unauthenticated, so nothing about an individual user's
+        key, not even its last characters or remaining quota, appears here.
+        """
+        user_states = [state for key, state in self.keys.items() if key not in self.server_keys]
+        return {
+            "serverKeys": [
+                {
+                    "key": state.key_id,
+                    "headroom": round(state.headroom(), 3),
+                    "inFlight": state.in_flight,
+                    "remainingRequests": state.remaining_requests,
+                    "remainingTokens": state.remaining_tokens
+                }
+                for key, state in self.keys.items() if key in self.server_keys
+            ],
+            "userKeys": {
+                "tracked": len(user_states),
+                "inFlight": sum(state.in_flight for state in user_states)
+            }
+        }
+
+    def _best_key(self, config: GroqConfig) -> KeyState:
+        """The request's own key, or the pool key with the most headroom for server-key requests"""
+        keys = [config.apiKey] if config.apiKey else []
+        if not config.apiKey or config.apiKey in self.server_keys or self.pool_for_user_keys:
+            keys += [key for key in self.pool_keys if key != config.apiKey]
+        if not keys:
+            raise AIAgentError("VALIDATION_ERROR", "A Groq API key is required (or set GROQ_API_KEY_POOL)")
+        return max((self._state(key) for key in keys), key=lambda state: state.headroom())
+
+    def _state(self, api_key: str) -> KeyState:
+        if api_key not in self.keys:
+            if len(self.keys) >= MAX_TRACKED_KEYS:
+                idle = [key for key, state in self.keys.items() if not state.in_flight and key not in self.pool_keys]
+                for key in idle[:len(idle) // 2 or 1]:
+                    del self.keys[key]
+            self.keys[api_key] = KeyState(api_key)
+        return self.keys[api_key]
+
+
+def reasoning_options(model: str, mode: str) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Request parameters and prompt directive that apply a reasoning mode to a model"""
+    if mode == "full":
+        return {}, None
+
+    if model.startswith("qwen/qwen3"):
+        if mode == "off":
+            # belt and braces: the API switch plus Qwen's own directive
+            return {"reasoning_effort": "none"}, "/no_think"
+        return (
+            {"reasoning_effort": "default", "reasoning_format": "parsed"},
+            "Keep your reasoning to a few short sentences before answering."
+        )
+
+    if model.startswith("openai/gpt-oss"):
+        # these can't switch reasoning off, only keep it short and out of the response
+        return {"reasoning_effort": "low", "include_reasoning": False}, None
+
+    # non-reasoning models take no extra parameters
+    return {}, None
+
+
+def parse_reset_duration(value: str) -> float:
+    """Parse Groq reset durations like "2m59.56s", "7.66s" or "120ms" into seconds"""
+    total = 0.0
+    for amount, unit in re.findall(r'([\d.]+)(ms|h|m|s)', value):
+        seconds = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}[unit]
+        total += float(amount) * seconds
+    return total or (_parse_float(value) or 0.0)
+
+
+def _parse_int(value: Optional[str], default: Optional[int]) -> Optional[int]:
+    try:
+        return int(float(value)) if value is not None else default
+    except ValueError:
+        return default
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _split_env(name: str, default: str = "") -> List[str]:
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
+
+
+_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """Get the process-wide router configured from the environment"""
+    global _router
+    if _router is None:
+        _router = ModelRouter(
+            pool_keys=_split_env('GROQ_API_KEY_POOL'),
+            fast_model=os.getenv('GROQ_FAST_MODEL'),
+            fast_languages=_split_env('GROQ_FAST_LANGUAGES', DEFAULT_FAST_LANGUAGES),
+            fast_content_types=_split_env('GROQ_FAST_CONTENT_TYPES', 'social-post'),
+            fast_max_chars=int(os.getenv('GROQ_FAST_MAX_CHARS', '1500')),
+            server_keys=_split_env('GROQ_API_KEY'),
+            pool_for_user_keys=os.getenv('GROQ_POOL_FOR_USER_KEYS', 'false').lower() in ('1', 'true', 'yes')
+        )
+    return _router
@@ -1,11 +1,37 @@
 import asyncio
+import hmac
 import os
+import time
 import uvicorn
-from fastapi import FastAPI, HTTPException, Header
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import ValidationError
 
-from .types import GenerationRequest, GenerationResponse, AIAgentError
+from .admission import INTERACTIVE, get_admission_controller, resolve_lane
+from .routing import get_model_router
+from .postprocess import get_postprocessor
+from .shared_state import get_shared_state
+from .latency_model import get_latency_model
+from .translation_memory import get_translation_memory
+from .batching import get_translation_batcher
+from .readiness import get_upstream_health, get_warm_up
+from .loop_monitor import get_loop_monitor
+from .profiling import ProfilerBusy, dump_requests, memory_diff, profile_cpu_pstats, sample_cpu
+from .validation import VALIDATION_STATS
+from .groq_service import REASONING_STATS, close_groq_clients
+from .tracing import get_trace_recorder, hash_text
+from .request_context import RequestContext, CANCELLATION_STATS, set_request_context, reset_request_context
+from .types import (
+    AddLanguagesRequest,
+    GenerationRequest,
+    GenerationResponse,
+    RetranslationRequest,
+    RetranslationResponse,
+    Length,
+    Tone,
+    AIAgentError
+)
 
 app = FastAPI(
     title="Project Linguist - AI Content Generator",
@@ -13,6 +39,15 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# how often a running request checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+
+# upstream calls needed in the window before the error rate can mark a worker unready
+READINESS_MIN_CALLS = 10
+
+# share of failed upstream calls in the window above which a worker reports unready
+READINESS_MAX_ERROR_RATE = 0.5
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -27,6 +62,41 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+async def startup():
+    """Warm up in the background (/ready answers 503 until done) and start the loop monitor"""
+    # before any request can create it: the server's main module is import-safe for worker processes
+    get_postprocessor("process")
+    
+    upstream_keys = []
+    if os.getenv("WARMUP_UPSTREAM", "false").lower() in ("1", "true", "yes"):
+        upstream_keys = get_model_router().pool_keys + ([os.environ["GROQ_API_KEY"]] if os.getenv("GROQ_API_KEY") else [])
+    app.state.warm_up_task = asyncio.create_task(get_warm_up().run(upstream_keys))
+    
+    monitor = get_loop_monitor()
+    if monitor:
+        monitor.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the worker pool and loop monitor, close pooled upstream connections and flush the translation memory and traces"""
+    get_postprocessor().shutdown()
+    await close_groq_clients()
+    
+    memory = get_translation_memory()
+    if memory:
+        await asyncio.to_thread(memory.close)
+    
+    recorder = get_trace_recorder()
+    if recorder:
+        await asyncio.to_thread(recorder.close)
+    
+    monitor = get_loop_monitor()
+    if monitor:
+        monitor.stop()
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -42,8 +112,35 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """Readiness for load balancers: warm-up finished and upstream not failing"""
+    warm_up = get_warm_up()
+    upstream = get_upstream_health().stats()
+    
+    max_error_rate = float(os.getenv("READINESS_MAX_ERROR_RATE", str(READINESS_MAX_ERROR_RATE)))
+    upstream_failing = upstream["calls"] >= READINESS_MIN_CALLS and upstream["errorRate"] > max_error_rate
+    ready = warm_up.ready and not upstream_failing
+    
+    response.status_code = 200 if ready else 503
+    admission = get_admission_controller().stats()
+    return {
+        "ready": ready,
+        "warmUp": warm_up.stats(),
+        "upstream": upstream,
+        "inFlight": admission["inFlight"],
+        "queueDepth": admission["queueDepth"]
+    }
+
+
 @app.post("/api/generate", response_model=GenerationResponse)
-async def generate_content(request: GenerationRequest, x_api_key: str = Header(..., alias="X-API-Key")):
+async def generate_content(
+    request: GenerationRequest,
+    http_request: Request,
+    x_api_key: str = Header(..., alias="X-API-Key"),
+    x_request_timeout: Optional[float] = Header(None, alias="X-Request-Timeout"),
+    x_priority: Optional[str] = Header(None, alias="X-Priority")
+):
     """Generate multilingual content"""
     try:
         # validate API key
@@ -57,6 +154,12 @@ async def generate_content(request: GenerationRequest, x_api_key: str = Header(.
         if not request.targetLanguages or len(request.targetLanguages) == 0:
             raise HTTPException(status_code=400, detail="At least one target language is required")
         
+        deadline_seconds = _deadline_seconds(x_request_timeout)
+        lane = resolve_lane(x_priority, x_api_key.strip())
+        
+        # refuse up front rather than generating an original we can't translate in time
+        get_admission_controller().check(1 + len(request.targetLanguages), deadline_seconds, lane)
+        
         # create agent with user's API key
         from .ai_agent import AIAgent
         from . import create_groq_config
@@ -64,33 +167,293 @@ async def generate_content(request: GenerationRequest, x_api_key: str = Header(.
         config = create_groq_config(x_api_key.strip())
         
         agent = AIAgent(config)
-        response = await agent.generate_multilingual_content(request)
+        return await _run_cancellable(
+            http_request,
+            lambda: agent.generate_multilingual_content(request),
+            deadline_seconds,
+            lane,
+            trace=("/api/generate", x_api_key.strip(), {
+                "priority": lane,
+                "contentType": request.contentType.value,
+                "length": (request.length or Length.MEDIUM).value,
+                "tone": (request.tone or Tone.PROFESSIONAL).value,
+                "sourceLanguage": request.sourceLanguage or "en",
+                "targetLanguages": request.targetLanguages,
+                "promptHash": hash_text(request.prompt),
+                "promptChars": len(request.prompt)
+            })
+        )
+        
+    except Exception as error:
+        _raise_http_error(error)
+
+
+@app.post("/api/retranslate", response_model=RetranslationResponse)
+async def retranslate_content(
+    request: RetranslationRequest,
+    http_request: Request,
+    x_api_key: str = Header(..., alias="X-API-Key"),
+    x_request_timeout: Optional[float] = Header(None, alias="X-Request-Timeout"),
+    x_priority: Optional[str] = Header(None, alias="X-Priority")
+):
+    """Re-translate an edited original, reusing translations of unchanged paragraphs"""
+    try:
+        if not x_api_key or not x_api_key.strip():
+            raise HTTPException(status_code=401, detail="Groq API key is required")
+        
+        if not request.editedContent or not request.editedContent.strip():
+            raise HTTPException(status_code=400, detail="Edited content is required")
+        
+        deadline_seconds = _deadline_seconds(x_request_timeout)
+        lane = resolve_lane(x_priority, x_api_key.strip())
+        
+        # at least one call per language if anything changed
+        get_admission_controller().check(len(request.previousGeneration.translations), deadline_seconds, lane)
+        
+        from .ai_agent import AIAgent
+        from . import create_groq_config
+        
+        config = create_groq_config(x_api_key.strip())
+        
+        agent = AIAgent(config)
+        return await _run_cancellable(
+            http_request,
+            lambda: agent.retranslate_content(request),
+            deadline_seconds,
+            lane,
+            trace=("/api/retranslate", x_api_key.strip(), {
+                "priority": lane,
+                "targetLanguages": [t.language for t in request.previousGeneration.translations],
+                "promptHash": hash_text(request.editedContent),
+                "promptChars": len(request.editedContent)
+            })
+        )
         
-        return response
+    except Exception as error:
+        _raise_http_error(error)
+
+
+@app.post("/api/sessions/{session_id}/languages", response_model=GenerationResponse)
+async def add_session_languages(
+    session_id: str,
+    request: AddLanguagesRequest,
+    http_request: Request,
+    x_api_key: str = Header(..., alias="X-API-Key"),
+    x_request_timeout: Optional[float] = Header(None, alias="X-Request-Timeout"),
+    x_priority: Optional[str] = Header(None, alias="X-Priority")
+):
+    """Return a generation in the requested languages, translating only those it doesn't have yet"""
+    try:
+        if not x_api_key or not x_api_key.strip():
+            raise HTTPException(status_code=401, detail="Groq API key is required")
+        
+        if not request.targetLanguages:
+            raise HTTPException(status_code=400, detail="At least one target language is required")
         
+        deadline_seconds = _deadline_seconds(x_request_timeout)
+        lane = resolve_lane(x_priority, x_api_key.strip())
+        
+        from .ai_agent import AIAgent
+        from . import create_groq_config
+        
+        config = create_groq_config(x_api_key.strip())
+        
+        agent = AIAgent(config)
+        return await _run_cancellable(
+            http_request,
+            lambda: agent.add_languages(session_id, request.targetLanguages),
+            deadline_seconds,
+            lane,
+            trace=("/api/sessions/languages", x_api_key.strip(), {
+                "priority": lane,
+                "targetLanguages": request.targetLanguages
+            })
+        )
+        
+    except Exception as error:
+        _raise_http_error(error)
+
+
+def _deadline_seconds(header_value: Optional[float]) -> Optional[float]:
+    """Per-request deadline from the X-Request-Timeout header or REQUEST_TIMEOUT_SECONDS"""
+    deadline_seconds = header_value or float(os.getenv("REQUEST_TIMEOUT_SECONDS", "0"))
+    return deadline_seconds if deadline_seconds > 0 else None
+
+
+async def _run_cancellable(
+    http_request: Request,
+    operation,
+    deadline_seconds: Optional[float],
+    lane: str = INTERACTIVE,
+    trace: Optional[tuple] = None
+):
+    """Run agent work under a deadline, cancelling all upstream calls if the client disconnects"""
+    context = RequestContext(deadline_seconds, lane, http_request.url.path)
+    status = "error"
+    
+    # tasks inherit the context they were created in, so every translation sees the deadline
+    token = set_request_context(context)
+    try:
+        task = asyncio.create_task(operation())
+    finally:
+        reset_request_context(token)
+    
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                result = task.result()
+                status = "ok"
+                return result
+            
+            if await http_request.is_disconnected():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                CANCELLATION_STATS["cancelledRequests"] += 1
+                status = "disconnected"
+                print(f"Client disconnected: cancelled {context.cancelled_calls} upstream calls "
+                      f"(~{context.tokens_saved} tokens saved)")
+                # nginx's "client closed request"; nobody is listening for it anyway
+                return Response(status_code=499)
+    
     except AIAgentError as error:
+        status = error.type
+        if error.type == "DEADLINE_EXCEEDED":
+            error.details.update({
+                "cancelledCalls": context.cancelled_calls,
+                "estimatedTokensSaved": context.tokens_saved
+            })
+            print(f"Deadline exceeded: cancelled {context.cancelled_calls} upstream calls "
+                  f"(~{context.tokens_saved} tokens saved)")
+        raise error
+    
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    
+    finally:
+        context.finish()
+        if status != "disconnected":
+            get_admission_controller().record_latency(lane, time.monotonic() - context.started_at)
+        
+        recorder = get_trace_recorder()
+        if recorder and trace:
+            endpoint, api_key, shape = trace
+            recorder.record(endpoint, api_key, shape, context, status)
+
+
+def _raise_http_error(error: Exception) -> None:
+    """Map agent and upstream errors to HTTP errors"""
+    if isinstance(error, HTTPException):
+        raise error
+    
+    if isinstance(error, AIAgentError):
         # handle specific error types
         if error.type == "VALIDATION_ERROR":
             raise HTTPException(status_code=400, detail=error.message)
+        elif error.type == "OVERLOADED":
+            raise HTTPException(
+                status_code=503,
+                detail=error.message,
+                headers={"Retry-After": str(error.details.get("retryAfter", 1))}
+            )
+        elif error.type == "NOT_FOUND":
+            raise HTTPException(status_code=404, detail=error.message)
+        elif error.type == "DEADLINE_EXCEEDED":
+            # the details say what the deadline cancelled and how many tokens that saved
+            raise HTTPException(status_code=504, detail={"message": error.message, **error.details})
         elif error.type == "RATE_LIMIT":
-            raise HTTPException(status_code=429, detail="Rate limit exceeded. Please try again later.")
+            retry_after = error.details.get("retryAfter")
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded. Please try again later.",
+                headers={"Retry-After": str(max(1, round(retry_after)))} if retry_after else None
+            )
         elif error.type == "API_ERROR" and "unauthorized" in error.message.lower():
             raise HTTPException(status_code=401, detail="Invalid API key. Please check your Groq API key.")
         else:
             raise HTTPException(status_code=500, detail=error.message)
     
-    except ValidationError as error:
+    if isinstance(error, ValidationError):
         raise HTTPException(status_code=400, detail=f"Validation error: {str(error)}")
     
-    except Exception as error:
-        error_str = str(error)
-        print(f"API Error: {error}")
-        
-        # check for unauthorized/authentication errors
-        if "unauthorized" in error_str.lower() or "401" in error_str or "invalid" in error_str.lower():
-            raise HTTPException(status_code=401, detail="Invalid API key. Please check your Groq API key.")
-        
-        raise HTTPException(status_code=500, detail=str(error))
+    error_str = str(error)
+    print(f"API Error: {error}")
+    
+    # check for unauthorized/authentication errors
+    if "unauthorized" in error_str.lower() or "401" in error_str or "invalid" in error_str.lower():
+        raise HTTPException(status_code=401, detail="Invalid API key. Please check your Groq API key.")
+    
+    raise HTTPException(status_code=500, detail=str(error))
+
+
+@app.get("/metrics")
+async def metrics():
+    """Upstream load: admission queue and rate-limit headroom of the server's own keys"""
+    return {
+        "admission": get_admission_controller().stats(),
+        "keys": get_model_router().stats(),
+        "cancellation": CANCELLATION_STATS,
+        "postprocess": get_postprocessor().stats(),
+        "validationRejections": VALIDATION_STATS,
+        "reasoning": REASONING_STATS,
+        "sharedState": get_shared_state().stats(),
+        "languageLatency": get_latency_model().stats(),
+        "translationMemory": get_translation_memory().stats() if get_translation_memory() else None,
+        "batching": get_translation_batcher().stats() if get_translation_batcher() else None,
+        "upstream": get_upstream_health().stats(),
+        "eventLoop": get_loop_monitor().stats() if get_loop_monitor() else None
+    }
+
+
+def _require_admin(x_admin_token: Optional[str]) -> None:
+    """Admin endpoints are off unless ADMIN_TOKEN is set, and then need it in X-Admin-Token"""
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.get("/admin/profile/cpu")
+async def profile_cpu(
+    seconds: float = 10,
+    format: str = "collapsed",
+    all_threads: bool = False,
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Profile this worker's CPU for a while, as collapsed stacks (flamegraphs) or a pstats file"""
+    _require_admin(x_admin_token)
+    if format not in ("collapsed", "pstats"):
+        raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'pstats'")
+    
+    try:
+        if format == "pstats":
+            return Response(
+                await profile_cpu_pstats(seconds),
+                media_type="application/octet-stream",
+                headers={"Content-Disposition": f"attachment; filename=linguist-{os.getpid()}.pstats"}
+            )
+        return Response(await sample_cpu(seconds, all_threads=all_threads), media_type="text/plain")
+    except ProfilerBusy as error:
+        raise HTTPException(status_code=409, detail=str(error))
+
+
+@app.get("/admin/profile/memory")
+async def profile_memory(seconds: float = 10, limit: int = 25, x_admin_token: Optional[str] = Header(None)):
+    """Top allocation growth over a window, from two tracemalloc snapshots"""
+    _require_admin(x_admin_token)
+    try:
+        return await memory_diff(seconds, limit)
+    except ProfilerBusy as error:
+        raise HTTPException(status_code=409, detail=str(error))
+
+
+@app.get("/admin/requests")
+async def in_flight_requests(x_admin_token: Optional[str] = Header(None)):
+    """In-flight requests with per-language call states, to find stuck translations"""
+    _require_admin(x_admin_token)
+    return {"pid": os.getpid(), "requests": dump_requests()}
 
 
 @app.get("/api/languages")
@@ -115,5 +478,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=port,
         reload=True,
-        log_level="info"
+        log_level="info",
+        # the loop monitor times callbacks through asyncio's own handles, which uvloop bypasses
+        loop="asyncio" if get_loop_monitor() else "auto"
     ) 
\ No newline at end of file
@@ -0,0 +1,353 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from .request_context import current_request_context
+from .types import AIAgentError
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # optional: only needed when SHARED_STATE_URL points at Redis
+    redis_asyncio = None
+
+
+KEY_PREFIX = "linguist:"
+
+# cap on cached translations held by the in-process backend
+MAX_LOCAL_ENTRIES = 10000
+
+# cap on generation sessions held in-process; they're much larger than cache entries
+MAX_LOCAL_SESSIONS = 1000
+
+# and on their total serialized size, since one can carry a hundred long translations
+MAX_LOCAL_SESSION_BYTES = 64 * 2 ** 20
+
+# atomically refill and reserve from every bucket in KEYS, or from none of them
+# ARGV: max_wait, then rate/capacity/cost per bucket; returns {reserved, wait}
+TOKEN_BUCKET_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local max_wait = tonumber(ARGV[1])
+local wait = 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local capacity = tonumber(ARGV[i * 3])
+    local cost = tonumber(ARGV[i * 3 + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - cost
+    levels[i] = tokens
+    if tokens < 0 then
+        wait = math.max(wait, -tokens / rate)
+    end
+end
+if wait > max_wait then
+    return {0, tostring(wait)}
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local capacity = tonumber(ARGV[i * 3])
+    redis.call('HSET', key, 'tokens', tostring(levels[i]), 'ts', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 60)
+end
+return {1, tostring(wait)}
+"""
+
+# delete a lock only if we still hold it
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LocalBackend:
+    """In-process stand-in for the shared backend, also used as the fallback"""
+
+    def __init__(self, max_entries: int = MAX_LOCAL_ENTRIES, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        # optional cap on the UTF-8 size of stored values, evicting least recently used first
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.values: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+        self.locks: Dict[str, Tuple[str, float]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self.values.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            self._discard(key)
+            return None
+        self.values.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self._discard(key)
+        size = self._size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # would evict everything else and still not fit
+            return
+        self.values[key] = (value, time.monotonic() + ttl if ttl else None)
+        self.bytes += size
+        while len(self.values) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            self._discard(next(iter(self.values)))
+
+    def _discard(self, key: str) -> None:
+        entry = self.values.pop(key, None)
+        if entry is not None:
+            self.bytes -= self._size(entry[0])
+
+    def _size(self, value: str) -> int:
+        return len(value.encode("utf-8")) if self.max_bytes is not None else 0
+
+    async def reserve(self, buckets: List[Tuple[str, float, float, float]], max_wait: float) -> Tuple[bool, float]:
+        """Same semantics as TOKEN_BUCKET_SCRIPT; buckets are (key, rate, capacity, cost)"""
+        now = time.monotonic()
+        wait = 0.0
+        levels = []
+        for key, rate, capacity, cost in buckets:
+            tokens, ts = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - ts) * rate) - cost
+            levels.append(tokens)
+            if tokens < 0:
+                wait = max(wait, -tokens / rate)
+
+        if wait > max_wait:
+            return False, wait
+        for (key, _, _, _), tokens in zip(buckets, levels):
+            self.buckets[key] = (tokens, now)
+        return True, wait
+
+    async def acquire_lock(self, key: str, token: str, ttl: float) -> bool:
+        holder = self.locks.get(key)
+        if holder and holder[1] > time.monotonic():
+            return False
+        self.locks[key] = (token, time.monotonic() + ttl)
+        return True
+
+    async def release_lock(self, key: str, token: str) -> None:
+        holder = self.locks.get(key)
+        if holder and holder[0] == token:
+            del self.locks[key]
+
+
+class RedisBackend:
+    """Shared backend on anything that speaks the Redis protocol"""
+
+    def __init__(self, url: str, timeout: float = 0.5):
+        if redis_asyncio is None:
+            raise ImportError("SHARED_STATE_URL needs the redis package: pip3 install redis")
+        self.client = redis_asyncio.from_url(
+            url, decode_responses=True, socket_timeout=timeout, socket_connect_timeout=timeout
+        )
+        self.bucket_script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.release_script = self.client.register_script(RELEASE_LOCK_SCRIPT)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        await self.client.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    async def reserve(self, buckets: List[Tuple[str, float, float, float]], max_wait: float) -> Tuple[bool, float]:
+        args = [max_wait]
+        for _, rate, capacity, cost in buckets:
+            args.extend([rate, capacity, cost])
+        reserved, wait = await self.bucket_script(keys=[key for key, _, _, _ in buckets], args=args)
+        return bool(int(reserved)), float(wait)
+
+    async def acquire_lock(self, key: str, token: str, ttl: float) -> bool:
+        return bool(await self.client.set(key, token, nx=True, px=int(ttl * 1000)))
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self.release_script(keys=[key], args=[token])
+
+
+class SharedState:
+    """Translation cache, per-key rate limits, single-flight locks and sessions shared across nodes"""
+
+    def __init__(
+        self,
+        remote: Optional[RedisBackend] = None,
+        cache_ttl: float = 0,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        lock_ttl: float = 120,
+        retry_seconds: float = 30,
+        session_ttl: float = 3600,
+        max_local_sessions: int = MAX_LOCAL_SESSIONS,
+        max_local_session_bytes: int = MAX_LOCAL_SESSION_BYTES
+    ):
+        self.remote = remote
+        self.local = LocalBackend()
+        # sessions get their own LRU so a burst of them can't evict cached translations
+        self.local_sessions = LocalBackend(max_local_sessions, max_local_session_bytes)
+        self.session_ttl = session_ttl
+        # the translation cache is opt-in; 0 translates every segment afresh
+        self.cache_ttl = cache_ttl
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.lock_ttl = lock_ttl
+        self.retry_seconds = retry_seconds
+        # while the remote is unreachable, everything runs local-only until this time
+        self.remote_down_until = 0.0
+        self.remote_errors = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.single_flight_waits = 0
+        self.throttled_calls = 0
+        self.throttled_seconds = 0.0
+
+    async def _call(self, operation: str, *args, local: Optional[LocalBackend] = None):
+        """Run an operation on the remote backend, falling back to the local one when it's down"""
+        if self.remote and time.monotonic() >= self.remote_down_until:
+            try:
+                return await getattr(self.remote, operation)(*args)
+            except Exception as error:
+                self.remote_errors += 1
+                self.remote_down_until = time.monotonic() + self.retry_seconds
+                print(f"Shared state backend unreachable ({error}), local-only for {self.retry_seconds:g}s")
+        return await getattr(local or self.local, operation)(*args)
+
+    async def cached(
+        self,
+        parts: dict,
+        produce: Callable[[], Awaitable[Tuple[str, bool]]]
+    ) -> Tuple[str, bool]:
+        """Return (value, hit) for a cache key, producing a missing value once across all nodes
+
+        produce returns the value and whether it's good enough to cache.
+        """
+        if not self.cache_ttl:
+            value, _ = await produce()
+            return value, False
+
+        key = KEY_PREFIX + "cache:" + _digest(parts)
+        value = await self._call("get", key)
+        if value is not None:
+            self.cache_hits += 1
+            return value, True
+
+        self.cache_misses += 1
+        lock_key = KEY_PREFIX + "lock:" + key
+        token = uuid.uuid4().hex
+        context = current_request_context()
+
+        while not await self._call("acquire_lock", lock_key, token, self.lock_ttl):
+            # another request (maybe on another node) is producing it - wait for its result
+            self.single_flight_waits += 1
+            if context:
+                context.check_deadline()
+            await asyncio.sleep(0.05)
+            value = await self._call("get", key)
+            if value is not None:
+                self.cache_hits += 1
+                return value, True
+
+        try:
+            value, cacheable = await produce()
+            if cacheable:
+                await self._call("set", key, value, self.cache_ttl)
+            return value, False
+        finally:
+            await self._call("release_lock", lock_key, token)
+
+    async def throttle(self, api_key: str, estimated_tokens: int, tokens_per_minute: Optional[int] = None) -> None:
+        """Wait until the key's shared request and token buckets allow another call"""
+        tokens_per_minute = self.tokens_per_minute or tokens_per_minute or 0
+        key_id = _digest({"key": api_key})
+        buckets = []
+        if self.requests_per_minute:
+            buckets.append((KEY_PREFIX + "rpm:" + key_id, self.requests_per_minute / 60, self.requests_per_minute, 1))
+        if tokens_per_minute:
+            cost = min(estimated_tokens, tokens_per_minute)
+            buckets.append((KEY_PREFIX + "tpm:" + key_id, tokens_per_minute / 60, tokens_per_minute, cost))
+        if not buckets:
+            return
+
+        context = current_request_context()
+        remaining = context.remaining() if context else None
+        max_wait = remaining if remaining is not None else 60.0
+
+        reserved, wait = await self._call("reserve", buckets, max_wait)
+        if not reserved:
+            if context and remaining is not None:
+                raise context.deadline_error()
+            raise _rate_limit_error(wait)
+
+        if wait > 0:
+            self.throttled_calls += 1
+            self.throttled_seconds += wait
+            await asyncio.sleep(wait)
+
+    async def load_session(self, session_id: str) -> Optional[str]:
+        """Stored session JSON, or None once it has expired or been evicted"""
+        return await self._call("get", KEY_PREFIX + "session:" + session_id, local=self.local_sessions)
+
+    async def save_session(self, session_id: str, value: str) -> None:
+        """Store a session, restarting its TTL"""
+        await self._call("set", KEY_PREFIX + "session:" + session_id, value, self.session_ttl, local=self.local_sessions)
+
+    def stats(self) -> dict:
+        """Counters for the metrics endpoint"""
+        return {
+            "backend": "redis" if self.remote else "local",
+            "remoteAvailable": bool(self.remote) and time.monotonic() >= self.remote_down_until,
+            "remoteErrors": self.remote_errors,
+            "cacheHits": self.cache_hits,
+            "cacheMisses": self.cache_misses,
+            "singleFlightWaits": self.single_flight_waits,
+            "throttledCalls": self.throttled_calls,
+            "throttledSeconds": round(self.throttled_seconds, 3),
+            "localSessions": len(self.local_sessions.values),
+            "localSessionBytes": self.local_sessions.bytes
+        }
+
+
+def _digest(parts: dict) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _rate_limit_error(wait: float) -> AIAgentError:
+    return AIAgentError(
+        "RATE_LIMIT",
+        "Rate limit exceeded. Please try again later.",
+        {"retryAfter": round(wait, 1)}
+    )
+
+
+_shared_state: Optional[SharedState] = None
+
+
+def get_shared_state() -> SharedState:
+    """Get the process-wide shared state configured from the environment"""
+    global _shared_state
+    if _shared_state is None:
+        url = os.getenv('SHARED_STATE_URL', '')
+        remote = None
+        if url and url != "memory://":
+            try:
+                remote = RedisBackend(url)
+            except ImportError as error:
+                print(f"{error} - running local-only")
+        _shared_state = SharedState(
+            remote=remote,
+            cache_ttl=float(os.getenv('TRANSLATION_CACHE_TTL_SECONDS', '0')),
+            requests_per_minute=int(os.getenv('KEY_REQUESTS_PER_MINUTE', '0')),
+            tokens_per_minute=int(os.getenv('KEY_TOKENS_PER_MINUTE', '0')),
+            lock_ttl=float(os.getenv('SHARED_LOCK_TTL_SECONDS', '120')),
+            session_ttl=float(os.getenv('SESSION_TTL_SECONDS', '3600')),
+            max_local_sessions=int(os.getenv('MAX_LOCAL_SESSIONS', str(MAX_LOCAL_SESSIONS))),
+            max_local_session_bytes=int(float(os.getenv('MAX_LOCAL_SESSION_MB', str(MAX_LOCAL_SESSION_BYTES // 2 ** 20))) * 2 ** 20)
+        )
+    return _shared_state
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+from typing import Optional
+from .request_context import RequestContext
+
+
+def hash_text(text: str) -> str:
+    """Short stable hash used in place of prompts and keys in traces"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class TraceRecorder:
+    """Appends anonymised per-request traces to a JSONL file for later replay
+
+    Traces are collected on the event loop and written by one background
+    writer thread, so capturing never blocks a request on file I/O.
+    """
+
+    def __init__(self, path: str, sample_rate: float = 1.0):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.recorded = 0
+        # traces waiting for the writer thread, None to stop it
+        self._writes: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    def record(
+        self,
+        endpoint: str,
+        api_key: str,
+        shape: dict,
+        context: RequestContext,
+        status: str
+    ) -> None:
+        """Write one trace line: request shape, upstream calls and outcome - never prompt text"""
+        if random.random() >= self.sample_rate:
+            return
+
+        trace = {
+            "arrivalTs": round(context.wall_started_at, 3),
+            "endpoint": endpoint,
+            "tenant": hash_text(api_key),
+            **shape,
+            "status": status,
+            "durationMs": int((time.monotonic() - context.started_at) * 1000),
+            "deadlineSeconds": round(context.deadline - context.started_at, 3) if context.deadline else None,
+            "calls": [usage.model_dump() for usage in context.call_usage] + list(context.call_errors),
+            "cancelledCalls": context.cancelled_calls
+        }
+
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+            self._writer.start()
+        self._writes.put(trace)
+
+    def close(self) -> None:
+        """Wait for queued traces to reach the file and stop the writer thread"""
+        if self._writer is None:
+            return
+        self._writes.put(None)
+        self._writer.join()
+        self._writer = None
+
+    def _write_loop(self) -> None:
+        while True:
+            trace = self._writes.get()
+            if trace is None:
+                return
+            try:
+                with open(self.path, "a", encoding="utf-8") as trace_file:
+                    trace_file.write(json.dumps(trace, ensure_ascii=False) + "\n")
+                self.recorded += 1
+            except OSError as error:
+                print(f"Trace write to {self.path} failed: {error}")
+
+
+_recorder: Optional[TraceRecorder] = None
+_recorder_loaded = False
+
+
+def get_trace_recorder() -> Optional[TraceRecorder]:
+    """Get the trace recorder if TRACE_CAPTURE_PATH is set, otherwise None"""
+    global _recorder, _recorder_loaded
+    if not _recorder_loaded:
+        _recorder_loaded = True
+        path = os.getenv('TRACE_CAPTURE_PATH')
+        if path:
+            _recorder = TraceRecorder(path, float(os.getenv('TRACE_SAMPLE_RATE', '1.0')))
+            print(f"Capturing request traces to {path}")
+    return _recorder
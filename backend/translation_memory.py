@@ -0,0 +1,362 @@
+import json
+import os
+import queue
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+from .tracing import hash_text
+from .utils import split_paragraphs
+
+
+# characters per shingle; short enough that a changed word only touches a few of them
+SHINGLE_CHARS = 5
+
+# MinHash signature length (one-permutation hashing bins), split into LSH bands of BAND_ROWS values each
+NUM_HASHES = 32
+BAND_ROWS = 4
+
+# segments shorter than this only match exactly; a few shingles say little about similarity
+MIN_FUZZY_CHARS = 40
+
+# candidates from the LSH buckets checked with exact similarity, most shared bands first
+MAX_CANDIDATES = 3
+
+MAX_SEGMENTS_PER_PAIR = 20000
+
+_HASH_MASK = (1 << 64) - 1
+
+
+class MemoryMatch:
+    """A stored segment similar enough to reuse, and its translation"""
+
+    def __init__(self, source: str, translation: str, similarity: float):
+        self.source = source
+        self.translation = translation
+        self.similarity = similarity
+
+    @property
+    def exact(self) -> bool:
+        return self.similarity >= 1.0
+
+
+class SegmentIndex:
+    """Segments of one language pair: exact lookup by normalized text plus MinHash LSH buckets"""
+
+    def __init__(self, max_segments: int = MAX_SEGMENTS_PER_PAIR):
+        self.max_segments = max_segments
+        # normalized source -> (source, translation), least recently used first
+        self.segments: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        self.bands: List[Dict[Tuple[int, ...], Set[str]]] = [{} for _ in range(NUM_HASHES // BAND_ROWS)]
+
+    def get(self, normalized: str) -> Optional[Tuple[str, str]]:
+        entry = self.segments.get(normalized)
+        if entry is not None:
+            self.segments.move_to_end(normalized)
+        return entry
+
+    def add(self, normalized: str, source: str, translation: str) -> bool:
+        """Store a segment; False if it was already stored with the same translation"""
+        if self.segments.get(normalized) == (source, translation):
+            self.segments.move_to_end(normalized)
+            return False
+
+        if normalized not in self.segments and len(normalized) >= MIN_FUZZY_CHARS:
+            for band, key in zip(self.bands, _band_keys(normalized)):
+                band.setdefault(key, set()).add(normalized)
+        self.segments[normalized] = (source, translation)
+        self.segments.move_to_end(normalized)
+
+        while len(self.segments) > self.max_segments:
+            evicted, _ = self.segments.popitem(last=False)
+            self._unindex(evicted)
+        return True
+
+    def similar(self, normalized: str, threshold: float) -> Optional[Tuple[str, float]]:
+        """Most similar stored segment at or above threshold, looking only in shared LSH buckets"""
+        # segments sharing more bands are more likely to be the closest ones
+        shared_bands: Counter = Counter()
+        for band, key in zip(self.bands, _band_keys(normalized)):
+            shared_bands.update(band.get(key, ()))
+        if not shared_bands:
+            return None
+
+        best = None
+        shingles = _shingles(normalized)
+        for candidate, _ in shared_bands.most_common(MAX_CANDIDATES):
+            similarity = _jaccard(shingles, _shingles(candidate))
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        return best
+
+    def _unindex(self, normalized: str) -> None:
+        if len(normalized) < MIN_FUZZY_CHARS:
+            return
+        for band, key in zip(self.bands, _band_keys(normalized)):
+            bucket = band.get(key)
+            if bucket is not None:
+                bucket.discard(normalized)
+                if not bucket:
+                    del band[key]
+
+
+class TranslationMemory:
+    """Paragraph-level translations by language pair, reused for identical and near-identical text
+
+    Fed from completed translations and persisted as an append-only JSONL
+    file, so repeated greetings, sign-offs and footers stop costing tokens.
+    Lookups and learning stay in memory; file writes go through one
+    background writer thread, so they never block the event loop.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        threshold: float = 0.8,
+        adapt: bool = True,
+        scope: str = "key",
+        max_segments: int = MAX_SEGMENTS_PER_PAIR
+    ):
+        self.path = path
+        self.threshold = threshold
+        self.adapt = adapt
+        self.scope = scope
+        self.max_segments = max_segments
+        self.indexes: Dict[Tuple[str, str, str], SegmentIndex] = {}
+        self._file_lines = 0
+        # ("append", entries) or ("rewrite", snapshot) jobs for the writer thread, None to stop it
+        self._writes: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+        self.lookups = 0
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.adapted = 0
+        self.stored = 0
+
+        if path:
+            self._load()
+
+    def scope_for(self, api_key: str) -> str:
+        """Memory is private to each API key unless TRANSLATION_MEMORY_SCOPE is global"""
+        return "*" if self.scope == "global" else hash_text(api_key)
+
+    def lookup(self, scope: str, source_language: str, target_language: str, segment: str) -> Optional[MemoryMatch]:
+        self.lookups += 1
+        index = self.indexes.get((scope, source_language, target_language))
+        if index is None:
+            return None
+
+        normalized = _normalize(segment)
+        entry = index.get(normalized)
+        if entry is not None:
+            self.exact_hits += 1
+            return MemoryMatch(entry[0], entry[1], 1.0)
+
+        if self.threshold >= 1.0 or len(normalized) < MIN_FUZZY_CHARS:
+            return None
+        found = index.similar(normalized, self.threshold)
+        if found is None:
+            return None
+        self.fuzzy_hits += 1
+        source, translation = index.get(found[0])
+        return MemoryMatch(source, translation, found[1])
+
+    def learn(
+        self,
+        scope: str,
+        source_language: str,
+        target_language: str,
+        source_text: str,
+        translated_text: str
+    ) -> int:
+        """Store each paragraph with its translation; nothing if the paragraphs don't line up"""
+        sources = split_paragraphs(source_text)
+        translations = split_paragraphs(translated_text)
+        if not sources or len(sources) != len(translations):
+            return 0
+
+        added = []
+        index = self.indexes.setdefault((scope, source_language, target_language), SegmentIndex(self.max_segments))
+        for source, translation in zip(sources, translations):
+            if index.add(_normalize(source), source, translation):
+                added.append({
+                    "scope": scope,
+                    "source": source_language,
+                    "target": target_language,
+                    "text": source,
+                    "translation": translation
+                })
+        self.stored += len(added)
+        if added and self.path:
+            self._write("append", added)
+            self._file_lines += len(added)
+
+            # rewrite without superseded and evicted lines once they make up most of the file
+            live = sum(len(index.segments) for index in self.indexes.values())
+            if self._file_lines > 2 * live + 1000:
+                # copied here, on the thread that changes the indexes, and written out by the writer
+                self._write("rewrite", [(key, list(index.segments.values())) for key, index in self.indexes.items()])
+                self._file_lines = live
+        return len(added)
+
+    def close(self) -> None:
+        """Wait for pending writes to reach the file and stop the writer thread"""
+        if self._writer is None:
+            return
+        self._writes.put(None)
+        self._writer.join()
+        self._writer = None
+
+    def stats(self) -> dict:
+        """Counters for the metrics endpoint"""
+        return {
+            "segments": sum(len(index.segments) for index in self.indexes.values()),
+            "languagePairs": len(self.indexes),
+            "lookups": self.lookups,
+            "exactHits": self.exact_hits,
+            "fuzzyHits": self.fuzzy_hits,
+            "adapted": self.adapted,
+            "stored": self.stored
+        }
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as memory_file:
+            for line in memory_file:
+                self._file_lines += 1
+                try:
+                    entry = json.loads(line)
+                    key = (entry["scope"], entry["source"], entry["target"])
+                    index = self.indexes.setdefault(key, SegmentIndex(self.max_segments))
+                    index.add(_normalize(entry["text"]), entry["text"], entry["translation"])
+                except (ValueError, KeyError):
+                    # a torn last line from a crash mid-write
+                    continue
+        print(f"Translation memory loaded {self.stats()['segments']} segments from {self.path}")
+
+    def _write(self, kind: str, payload: list) -> None:
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="translation-memory-writer", daemon=True)
+            self._writer.start()
+        self._writes.put((kind, payload))
+
+    def _write_loop(self) -> None:
+        while True:
+            job = self._writes.get()
+            if job is None:
+                return
+            kind, payload = job
+            try:
+                if kind == "append":
+                    self._append(payload)
+                else:
+                    self._compact(payload)
+            except OSError as error:
+                # the entries are still in memory; they just won't survive a restart
+                print(f"Translation memory write to {self.path} failed: {error}")
+
+    def _append(self, entries: List[dict]) -> None:
+        with open(self.path, "a", encoding="utf-8") as memory_file:
+            for entry in entries:
+                memory_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _compact(self, snapshot: List[Tuple[Tuple[str, str, str], List[Tuple[str, str]]]]) -> None:
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as memory_file:
+            for (scope, source_language, target_language), segments in snapshot:
+                for source, translation in segments:
+                    memory_file.write(json.dumps({
+                        "scope": scope,
+                        "source": source_language,
+                        "target": target_language,
+                        "text": source,
+                        "translation": translation
+                    }, ensure_ascii=False) + "\n")
+        os.replace(temporary_path, self.path)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+@lru_cache(maxsize=4096)
+def _shingles(normalized: str) -> FrozenSet[int]:
+    if len(normalized) <= SHINGLE_CHARS:
+        grams = [normalized]
+    else:
+        grams = [normalized[i:i + SHINGLE_CHARS] for i in range(len(normalized) - SHINGLE_CHARS + 1)]
+    # signatures never leave the process, so the built-in (per-process seeded) hash will do
+    return frozenset(hash(gram) & _HASH_MASK for gram in grams)
+
+
+@lru_cache(maxsize=4096)
+def _signature(normalized: str) -> Tuple[int, ...]:
+    """One-permutation MinHash: the minimum per hash bin, one pass over the shingles
+
+    Empty bins borrow the next non-empty bin's value, tagged with the distance
+    (rotation densification), so short segments still compare bin for bin.
+    """
+    bins: List[Optional[int]] = [None] * NUM_HASHES
+    for shingle in _shingles(normalized):
+        slot, value = shingle % NUM_HASHES, shingle // NUM_HASHES
+        if bins[slot] is None or value < bins[slot]:
+            bins[slot] = value
+
+    signature = []
+    for slot in range(NUM_HASHES):
+        distance = 0
+        while bins[(slot + distance) % NUM_HASHES] is None:
+            distance += 1
+        signature.append(bins[(slot + distance) % NUM_HASHES] | (distance << 64))
+    return tuple(signature)
+
+
+def _band_keys(normalized: str) -> List[Tuple[int, ...]]:
+    signature = _signature(normalized)
+    return [signature[i:i + BAND_ROWS] for i in range(0, NUM_HASHES, BAND_ROWS)]
+
+
+def _jaccard(first: FrozenSet[int], second: FrozenSet[int]) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+_memory: Optional[TranslationMemory] = None
+_loader: Optional[threading.Thread] = None
+_loader_lock = threading.Lock()
+
+
+def get_translation_memory(wait: bool = False) -> Optional[TranslationMemory]:
+    """Get the process-wide translation memory if TRANSLATION_MEMORY_PATH is set, otherwise None
+
+    The first call starts loading the file in a background thread, once per
+    process. Until it has loaded this returns None, so requests meanwhile
+    translate without the memory instead of blocking the event loop, unless
+    wait is set.
+    """
+    global _loader
+    if _memory is None and os.getenv('TRANSLATION_MEMORY_PATH'):
+        with _loader_lock:
+            if _loader is None:
+                _loader = threading.Thread(target=_load_memory, name="translation-memory-loader", daemon=True)
+                _loader.start()
+        if wait:
+            _loader.join()
+    return _memory
+
+
+def _load_memory() -> None:
+    global _memory
+    try:
+        _memory = TranslationMemory(
+            os.environ['TRANSLATION_MEMORY_PATH'],
+            threshold=float(os.getenv('TRANSLATION_MEMORY_THRESHOLD', '0.8')),
+            adapt=os.getenv('TRANSLATION_MEMORY_ADAPT', 'true').lower() in ('1', 'true', 'yes'),
+            scope=os.getenv('TRANSLATION_MEMORY_SCOPE', 'key'),
+            max_segments=int(os.getenv('TRANSLATION_MEMORY_MAX_SEGMENTS', str(MAX_SEGMENTS_PER_PAIR)))
+        )
+    except (OSError, ValueError) as error:
+        print(f"Translation memory failed to load, running without it: {error}")
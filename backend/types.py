@@ -28,6 +28,8 @@ class Language(BaseModel):
     name: str
     nativeName: str
     family: str
+    # writing system expected in output, used to sanity-check translations
+    script: str = "Latin"
 
 
 # All available languages (119+ languages)
@@ -40,11 +42,11 @@ AVAILABLE_LANGUAGES = [
     Language(code='ro', name='Romanian', nativeName='Română', family='Indo-European'),
     Language(code='sv', name='Swedish', nativeName='Svenska', family='Indo-European'),
     Language(code='da', name='Danish', nativeName='Dansk', family='Indo-European'),
-    Language(code='bg', name='Bulgarian', nativeName='Български', family='Indo-European'),
-    Language(code='ru', name='Russian', nativeName='Русский', family='Indo-European'),
+    Language(code='bg', name='Bulgarian', nativeName='Български', family='Indo-European', script='Cyrillic'),
+    Language(code='ru', name='Russian', nativeName='Русский', family='Indo-European', script='Cyrillic'),
     Language(code='cs', name='Czech', nativeName='Čeština', family='Indo-European'),
-    Language(code='el', name='Greek', nativeName='Ελληνικά', family='Indo-European'),
-    Language(code='uk', name='Ukrainian', nativeName='Українська', family='Indo-European'),
+    Language(code='el', name='Greek', nativeName='Ελληνικά', family='Indo-European', script='Greek'),
+    Language(code='uk', name='Ukrainian', nativeName='Українська', family='Indo-European', script='Cyrillic'),
     Language(code='es', name='Spanish', nativeName='Español', family='Indo-European'),
     Language(code='nl', name='Dutch', nativeName='Nederlands', family='Indo-European'),
     Language(code='sk', name='Slovak', nativeName='Slovenčina', family='Indo-European'),
@@ -53,35 +55,35 @@ AVAILABLE_LANGUAGES = [
     Language(code='lt', name='Lithuanian', nativeName='Lietuvių', family='Indo-European'),
     Language(code='nb', name='Norwegian Bokmål', nativeName='Norsk Bokmål', family='Indo-European'),
     Language(code='nn', name='Norwegian Nynorsk', nativeName='Norsk Nynorsk', family='Indo-European'),
-    Language(code='fa', name='Persian', nativeName='فارسی', family='Indo-European'),
+    Language(code='fa', name='Persian', nativeName='فارسی', family='Indo-European', script='Arabic'),
     Language(code='sl', name='Slovenian', nativeName='Slovenščina', family='Indo-European'),
-    Language(code='gu', name='Gujarati', nativeName='ગુજરાતી', family='Indo-European'),
+    Language(code='gu', name='Gujarati', nativeName='ગુજરાતી', family='Indo-European', script='Gujarati'),
     Language(code='lv', name='Latvian', nativeName='Latviešu', family='Indo-European'),
     Language(code='it', name='Italian', nativeName='Italiano', family='Indo-European'),
     Language(code='oc', name='Occitan', nativeName='Occitan', family='Indo-European'),
-    Language(code='ne', name='Nepali', nativeName='नेपाली', family='Indo-European'),
-    Language(code='mr', name='Marathi', nativeName='मराठी', family='Indo-European'),
-    Language(code='be', name='Belarusian', nativeName='Беларуская', family='Indo-European'),
-    Language(code='sr', name='Serbian', nativeName='Српски', family='Indo-European'),
+    Language(code='ne', name='Nepali', nativeName='नेपाली', family='Indo-European', script='Devanagari'),
+    Language(code='mr', name='Marathi', nativeName='मराठी', family='Indo-European', script='Devanagari'),
+    Language(code='be', name='Belarusian', nativeName='Беларуская', family='Indo-European', script='Cyrillic'),
+    Language(code='sr', name='Serbian', nativeName='Српски', family='Indo-European', script='Cyrillic'),
     Language(code='lb', name='Luxembourgish', nativeName='Lëtzebuergesch', family='Indo-European'),
     Language(code='vec', name='Venetian', nativeName='Vèneto', family='Indo-European'),
-    Language(code='as', name='Assamese', nativeName='অসমীয়া', family='Indo-European'),
+    Language(code='as', name='Assamese', nativeName='অসমীয়া', family='Indo-European', script='Bengali'),
     Language(code='cy', name='Welsh', nativeName='Cymraeg', family='Indo-European'),
     Language(code='szl', name='Silesian', nativeName='Ślōnski', family='Indo-European'),
     Language(code='ast', name='Asturian', nativeName='Asturianu', family='Indo-European'),
-    Language(code='hne', name='Chhattisgarhi', nativeName='छत्तीसगढ़ी', family='Indo-European'),
-    Language(code='awa', name='Awadhi', nativeName='अवधी', family='Indo-European'),
-    Language(code='mai', name='Maithili', nativeName='मैथिली', family='Indo-European'),
-    Language(code='bho', name='Bhojpuri', nativeName='भोजपुरी', family='Indo-European'),
-    Language(code='sd', name='Sindhi', nativeName='سنڌي', family='Indo-European'),
+    Language(code='hne', name='Chhattisgarhi', nativeName='छत्तीसगढ़ी', family='Indo-European', script='Devanagari'),
+    Language(code='awa', name='Awadhi', nativeName='अवधी', family='Indo-European', script='Devanagari'),
+    Language(code='mai', name='Maithili', nativeName='मैथिली', family='Indo-European', script='Devanagari'),
+    Language(code='bho', name='Bhojpuri', nativeName='भोजपुरी', family='Indo-European', script='Devanagari'),
+    Language(code='sd', name='Sindhi', nativeName='سنڌي', family='Indo-European', script='Arabic'),
     Language(code='ga', name='Irish', nativeName='Gaeilge', family='Indo-European'),
     Language(code='fo', name='Faroese', nativeName='Føroyskt', family='Indo-European'),
-    Language(code='hi', name='Hindi', nativeName='हिन्दी', family='Indo-European'),
-    Language(code='pa', name='Punjabi', nativeName='ਪੰਜਾਬੀ', family='Indo-European'),
-    Language(code='bn', name='Bengali', nativeName='বাংলা', family='Indo-European'),
-    Language(code='or', name='Oriya', nativeName='ଓଡ଼ିଆ', family='Indo-European'),
-    Language(code='tg', name='Tajik', nativeName='Тоҷикӣ', family='Indo-European'),
-    Language(code='yi', name='Eastern Yiddish', nativeName='ייִדיש', family='Indo-European'),
+    Language(code='hi', name='Hindi', nativeName='हिन्दी', family='Indo-European', script='Devanagari'),
+    Language(code='pa', name='Punjabi', nativeName='ਪੰਜਾਬੀ', family='Indo-European', script='Gurmukhi'),
+    Language(code='bn', name='Bengali', nativeName='বাংলা', family='Indo-European', script='Bengali'),
+    Language(code='or', name='Oriya', nativeName='ଓଡ଼ିଆ', family='Indo-European', script='Oriya'),
+    Language(code='tg', name='Tajik', nativeName='Тоҷикӣ', family='Indo-European', script='Cyrillic'),
+    Language(code='yi', name='Eastern Yiddish', nativeName='ייִדיש', family='Indo-European', script='Hebrew'),
     Language(code='lmo', name='Lombard', nativeName='Lumbaart', family='Indo-European'),
     Language(code='lij', name='Ligurian', nativeName='Ligure', family='Indo-European'),
     Language(code='scn', name='Sicilian', nativeName='Sicilianu', family='Indo-European'),
@@ -92,31 +94,31 @@ AVAILABLE_LANGUAGES = [
     Language(code='is', name='Icelandic', nativeName='Íslenska', family='Indo-European'),
     Language(code='sq', name='Albanian', nativeName='Shqip', family='Indo-European'),
     Language(code='li', name='Limburgish', nativeName='Limburgs', family='Indo-European'),
-    Language(code='prs', name='Dari', nativeName='دری', family='Indo-European'),
+    Language(code='prs', name='Dari', nativeName='دری', family='Indo-European', script='Arabic'),
     Language(code='af', name='Afrikaans', nativeName='Afrikaans', family='Indo-European'),
-    Language(code='mk', name='Macedonian', nativeName='Македонски', family='Indo-European'),
-    Language(code='si', name='Sinhala', nativeName='සිංහල', family='Indo-European'),
-    Language(code='ur', name='Urdu', nativeName='اردو', family='Indo-European'),
-    Language(code='mag', name='Magahi', nativeName='मगही', family='Indo-European'),
+    Language(code='mk', name='Macedonian', nativeName='Македонски', family='Indo-European', script='Cyrillic'),
+    Language(code='si', name='Sinhala', nativeName='සිංහල', family='Indo-European', script='Sinhala'),
+    Language(code='ur', name='Urdu', nativeName='اردو', family='Indo-European', script='Arabic'),
+    Language(code='mag', name='Magahi', nativeName='मगही', family='Indo-European', script='Devanagari'),
     Language(code='bs', name='Bosnian', nativeName='Bosanski', family='Indo-European'),
-    Language(code='hy', name='Armenian', nativeName='Հայերեն', family='Indo-European'),
+    Language(code='hy', name='Armenian', nativeName='Հայերեն', family='Indo-European', script='Armenian'),
 
     # Sino-Tibetan Languages
-    Language(code='zh', name='Chinese (Simplified)', nativeName='简体中文', family='Sino-Tibetan'),
-    Language(code='zh-TW', name='Chinese (Traditional)', nativeName='繁體中文', family='Sino-Tibetan'),
-    Language(code='yue', name='Cantonese', nativeName='粵語', family='Sino-Tibetan'),
-    Language(code='my', name='Burmese', nativeName='မြန်မာ', family='Sino-Tibetan'),
+    Language(code='zh', name='Chinese (Simplified)', nativeName='简体中文', family='Sino-Tibetan', script='Han'),
+    Language(code='zh-TW', name='Chinese (Traditional)', nativeName='繁體中文', family='Sino-Tibetan', script='Han'),
+    Language(code='yue', name='Cantonese', nativeName='粵語', family='Sino-Tibetan', script='Han'),
+    Language(code='my', name='Burmese', nativeName='မြန်မာ', family='Sino-Tibetan', script='Myanmar'),
 
     # Afro-Asiatic Languages
-    Language(code='ar', name='Arabic (Standard)', nativeName='العربية', family='Afro-Asiatic'),
-    Language(code='ar-SA', name='Arabic (Najdi)', nativeName='العربية النجدية', family='Afro-Asiatic'),
-    Language(code='ar-LB', name='Arabic (Levantine)', nativeName='العربية الشامية', family='Afro-Asiatic'),
-    Language(code='ar-EG', name='Arabic (Egyptian)', nativeName='العربية المصرية', family='Afro-Asiatic'),
-    Language(code='ar-MA', name='Arabic (Moroccan)', nativeName='العربية المغربية', family='Afro-Asiatic'),
-    Language(code='ar-IQ', name='Arabic (Mesopotamian)', nativeName='العربية العراقية', family='Afro-Asiatic'),
-    Language(code='ar-YE', name='Arabic (Ta\'izzi-Adeni)', nativeName='العربية اليمنية', family='Afro-Asiatic'),
-    Language(code='ar-TN', name='Arabic (Tunisian)', nativeName='العربية التونسية', family='Afro-Asiatic'),
-    Language(code='he', name='Hebrew', nativeName='עברית', family='Afro-Asiatic'),
+    Language(code='ar', name='Arabic (Standard)', nativeName='العربية', family='Afro-Asiatic', script='Arabic'),
+    Language(code='ar-SA', name='Arabic (Najdi)', nativeName='العربية النجدية', family='Afro-Asiatic', script='Arabic'),
+    Language(code='ar-LB', name='Arabic (Levantine)', nativeName='العربية الشامية', family='Afro-Asiatic', script='Arabic'),
+    Language(code='ar-EG', name='Arabic (Egyptian)', nativeName='العربية المصرية', family='Afro-Asiatic', script='Arabic'),
+    Language(code='ar-MA', name='Arabic (Moroccan)', nativeName='العربية المغربية', family='Afro-Asiatic', script='Arabic'),
+    Language(code='ar-IQ', name='Arabic (Mesopotamian)', nativeName='العربية العراقية', family='Afro-Asiatic', script='Arabic'),
+    Language(code='ar-YE', name='Arabic (Ta\'izzi-Adeni)', nativeName='العربية اليمنية', family='Afro-Asiatic', script='Arabic'),
+    Language(code='ar-TN', name='Arabic (Tunisian)', nativeName='العربية التونسية', family='Afro-Asiatic', script='Arabic'),
+    Language(code='he', name='Hebrew', nativeName='עברית', family='Afro-Asiatic', script='Hebrew'),
     Language(code='mt', name='Maltese', nativeName='Malti', family='Afro-Asiatic'),
 
     # Austronesian Languages
@@ -134,22 +136,22 @@ AVAILABLE_LANGUAGES = [
     Language(code='war', name='Waray', nativeName='Winaray', family='Austronesian'),
 
     # Dravidian Languages
-    Language(code='ta', name='Tamil', nativeName='தமிழ்', family='Dravidian'),
-    Language(code='te', name='Telugu', nativeName='తెలుగు', family='Dravidian'),
-    Language(code='kn', name='Kannada', nativeName='ಕನ್ನಡ', family='Dravidian'),
-    Language(code='ml', name='Malayalam', nativeName='മലയാळം', family='Dravidian'),
+    Language(code='ta', name='Tamil', nativeName='தமிழ்', family='Dravidian', script='Tamil'),
+    Language(code='te', name='Telugu', nativeName='తెలుగు', family='Dravidian', script='Telugu'),
+    Language(code='kn', name='Kannada', nativeName='ಕನ್ನಡ', family='Dravidian', script='Kannada'),
+    Language(code='ml', name='Malayalam', nativeName='മലയാळം', family='Dravidian', script='Malayalam'),
 
     # Turkic Languages
     Language(code='tr', name='Turkish', nativeName='Türkçe', family='Turkic'),
     Language(code='az', name='Azerbaijani', nativeName='Azərbaycan', family='Turkic'),
     Language(code='uz', name='Uzbek', nativeName='Oʻzbek', family='Turkic'),
-    Language(code='kk', name='Kazakh', nativeName='Қазақша', family='Turkic'),
-    Language(code='ba', name='Bashkir', nativeName='Башҡорт', family='Turkic'),
-    Language(code='tt', name='Tatar', nativeName='Татар', family='Turkic'),
+    Language(code='kk', name='Kazakh', nativeName='Қазақша', family='Turkic', script='Cyrillic'),
+    Language(code='ba', name='Bashkir', nativeName='Башҡорт', family='Turkic', script='Cyrillic'),
+    Language(code='tt', name='Tatar', nativeName='Татар', family='Turkic', script='Cyrillic'),
 
     # Tai-Kadai Languages
-    Language(code='th', name='Thai', nativeName='ไทย', family='Tai-Kadai'),
-    Language(code='lo', name='Lao', nativeName='ລາວ', family='Tai-Kadai'),
+    Language(code='th', name='Thai', nativeName='ไทย', family='Tai-Kadai', script='Thai'),
+    Language(code='lo', name='Lao', nativeName='ລາວ', family='Tai-Kadai', script='Lao'),
 
     # Uralic Languages
     Language(code='fi', name='Finnish', nativeName='Suomi', family='Uralic'),
@@ -158,12 +160,12 @@ AVAILABLE_LANGUAGES = [
 
     # Austroasiatic Languages
     Language(code='vi', name='Vietnamese', nativeName='Tiếng Việt', family='Austroasiatic'),
-    Language(code='km', name='Khmer', nativeName='ខ្មែរ', family='Austroasiatic'),
+    Language(code='km', name='Khmer', nativeName='ខ្មែរ', family='Austroasiatic', script='Khmer'),
 
     # Other Languages
-    Language(code='ja', name='Japanese', nativeName='日本語', family='Japonic'),
-    Language(code='ko', name='Korean', nativeName='한국어', family='Koreanic'),
-    Language(code='ka', name='Georgian', nativeName='ქართული', family='Kartvelian'),
+    Language(code='ja', name='Japanese', nativeName='日本語', family='Japonic', script='Japanese'),
+    Language(code='ko', name='Korean', nativeName='한국어', family='Koreanic', script='Hangul'),
+    Language(code='ka', name='Georgian', nativeName='ქართული', family='Kartvelian', script='Georgian'),
     Language(code='eu', name='Basque', nativeName='Euskera', family='Language Isolate'),
     Language(code='ht', name='Haitian', nativeName='Kreyòl Ayisyen', family='Creole'),
     Language(code='pap', name='Papiamento', nativeName='Papiamentu', family='Creole'),
@@ -201,11 +203,59 @@ class GeneratedContent(BaseModel):
     metadata: Optional[ContentMetadata] = None
 
 
+class CallUsage(BaseModel):
+    task: str
+    language: Optional[str] = None
+    model: str
+    reasoningMode: str
+    promptTokens: Optional[int] = None
+    completionTokens: Optional[int] = None
+    # completion tokens that ended up in the output rather than in discarded reasoning
+    visibleTokens: Optional[int] = None
+    latencyMs: int
+
+
 class GenerationResponse(BaseModel):
     originalContent: GeneratedContent
     translations: List[GeneratedContent]
     totalTokensUsed: Optional[int] = None
     processingTime: int
+    callUsage: Optional[List[CallUsage]] = None
+    # pass to /api/sessions/{sessionId}/languages to add languages without regenerating
+    sessionId: Optional[str] = None
+
+
+class AddLanguagesRequest(BaseModel):
+    targetLanguages: List[str]
+
+
+class GenerationSession(BaseModel):
+    sessionId: str
+    # hash of the API key that created it; other keys can't read it
+    keyHash: str
+    request: GenerationRequest
+    sourceLanguage: str
+    originalContent: GeneratedContent
+    translations: List[GeneratedContent]
+    createdAt: float
+
+
+class RetranslationRequest(BaseModel):
+    previousGeneration: GenerationResponse
+    editedContent: str
+    sourceLanguage: Optional[str] = None
+    # the original generation's content type, so changed paragraphs are prompted the same way
+    contentType: Optional[ContentType] = None
+
+
+class RetranslationResponse(BaseModel):
+    originalContent: GeneratedContent
+    translations: List[GeneratedContent]
+    changedParagraphs: int
+    totalParagraphs: int
+    reuseRatio: float
+    totalTokensUsed: Optional[int] = None
+    processingTime: int
 
 
 class GroqConfig(BaseModel):
@@ -213,6 +263,32 @@ class GroqConfig(BaseModel):
     model: str 
     maxTokens: Optional[int]
     temperature: Optional[float]
+    # "off", "long" (only Length.LONG requests) or "always"
+    chunkedTranslation: Optional[str] = "off"
+    chunkMaxChars: Optional[int] = 1500
+    # translate paragraphs while the original is still streaming
+    pipelinedGeneration: Optional[bool] = False
+    # stream translations through a local validator and retry clearly bad ones early
+    validateTranslations: Optional[bool] = False
+    validationRetries: Optional[int] = 2
+    # follow-up calls allowed when a completion stops at the token limit
+    maxContinuations: Optional[int] = 2
+    # reasoning for original generation and for translations: "off", "low" or "full"
+    reasoningMode: Optional[str] = "full"
+    translationReasoningMode: Optional[str] = "off"
+
+
+class RouteDecision(BaseModel):
+    apiKey: str
+    model: str
+    # masked key label, safe to log
+    keyId: Optional[str] = None
+    task: str = "generation"
+    language: Optional[str] = None
+    # "off", "low" or "full"
+    reasoningMode: str = "full"
+    # characters of source content being translated, for latency estimates
+    contentLength: int = 0
 
 
 class AIAgentError(Exception):
@@ -1,6 +1,7 @@
 import re
 import math
-from typing import Dict, List
+import difflib
+from typing import Dict, List, Tuple
 from .types import GeneratedContent, ContentMetadata
 
 
@@ -182,4 +183,115 @@ def remove_thinking_blocks(content: str) -> str:
     
     # clean up extra whitespace and return
     cleaned_content = re.sub(r'\n{3,}', '\n\n', cleaned_content)
-    return cleaned_content.strip() 
\ No newline at end of file
+    return cleaned_content.strip() 
+
+
+def split_paragraphs(content: str) -> List[str]:
+    """Split content into paragraphs/sections separated by blank lines"""
+    # paragraphs and bullet lists are separated by blank lines (see generate_prompt)
+    blocks = [block.strip('\n') for block in re.split(r'\n[ \t]*\n', content.strip())]
+    return [block for block in blocks if block.strip()]
+
+
+def split_into_chunks(content: str, max_chars: int = 1500) -> List[str]:
+    """Split content into translation chunks along paragraph and section boundaries"""
+    blocks = split_paragraphs(content)
+    
+    chunks: List[str] = []
+    current: List[str] = []
+    current_length = 0
+    
+    for index, block in enumerate(blocks):
+        # keep a lead-in line like "Key features:" together with the list it introduces
+        introduces_next = block.rstrip().endswith(':') and index + 1 < len(blocks)
+        
+        if current and current_length + len(block) > max_chars and not current[-1].rstrip().endswith(':'):
+            chunks.append('\n\n'.join(current))
+            current = []
+            current_length = 0
+        
+        current.append(block)
+        current_length += len(block) + 2
+        
+        if current_length >= max_chars and not introduces_next:
+            chunks.append('\n\n'.join(current))
+            current = []
+            current_length = 0
+    
+    if current:
+        chunks.append('\n\n'.join(current))
+    
+    return chunks
+
+
+def diff_paragraphs(previous: List[str], edited: List[str]) -> List[Tuple[str, int, int, int, int]]:
+    """Diff two paragraph lists, returning difflib opcodes (tag, i1, i2, j1, j2)"""
+    # compare on normalized whitespace so re-wrapped but identical paragraphs still match
+    matcher = difflib.SequenceMatcher(
+        None,
+        [_normalize_whitespace(p) for p in previous],
+        [_normalize_whitespace(p) for p in edited],
+        autojunk=False
+    )
+    return matcher.get_opcodes()
+
+
+def _normalize_whitespace(paragraph: str) -> str:
+    return ' '.join(paragraph.split())
+
+
+def strip_overlap(previous: str, continuation: str, max_overlap: int = 500, min_overlap: int = 8) -> str:
+    """Drop the start of a continuation that repeats the end of the previous output"""
+    tail = previous[-max_overlap:]
+    for size in range(min(len(tail), len(continuation)), min_overlap - 1, -1):
+        if tail.endswith(continuation[:size]):
+            return continuation[size:]
+    return continuation
+
+
+class StreamSegmenter:
+    """Cut streamed text into paragraph segments as soon as each one is complete"""
+    
+    def __init__(self, min_chars: int = 400):
+        self.min_chars = min_chars
+        self.buffer = ""
+        self.pending: List[str] = []
+    
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text and return any segments that are now complete"""
+        self.buffer += text
+        
+        self.buffer = re.sub(r'<think(?:ing)?>.*?</think(?:ing)?>', '', self.buffer, flags=re.IGNORECASE | re.DOTALL)
+        
+        # hold everything while the model is still inside a thinking block
+        if re.search(r'<think', self.buffer, flags=re.IGNORECASE):
+            return []
+        
+        blocks = re.split(r'\n[ \t]*\n', self.buffer)
+        # the last block may still be growing
+        self.buffer = blocks.pop()
+        return self._collect(blocks, final=False)
+    
+    def flush(self) -> List[str]:
+        """Return whatever is left once the stream has ended"""
+        blocks = [remove_thinking_blocks(self.buffer)] if self.buffer.strip() else []
+        self.buffer = ""
+        return self._collect(blocks, final=True)
+    
+    def _collect(self, blocks: List[str], final: bool) -> List[str]:
+        segments = []
+        for block in blocks:
+            if not block.strip():
+                continue
+            self.pending.append(block.strip('\n'))
+            
+            # keep short paragraphs and list lead-ins together with what follows
+            pending_length = sum(len(p) for p in self.pending)
+            if pending_length >= self.min_chars and not block.rstrip().endswith(':'):
+                segments.append('\n\n'.join(self.pending))
+                self.pending = []
+        
+        if final and self.pending:
+            segments.append('\n\n'.join(self.pending))
+            self.pending = []
+        return segments
@@ -0,0 +1,132 @@
+import re
+from typing import Dict, List, Optional, Set, Tuple
+from .types import get_language_by_code
+
+
+# unicode ranges for each script used in AVAILABLE_LANGUAGES
+SCRIPT_RANGES: Dict[str, List[Tuple[int, int]]] = {
+    "Latin": [(0x0041, 0x024F), (0x1E00, 0x1EFF), (0x02B0, 0x02FF)],
+    "Cyrillic": [(0x0400, 0x052F)],
+    "Greek": [(0x0370, 0x03FF), (0x1F00, 0x1FFF)],
+    "Arabic": [(0x0600, 0x06FF), (0x0750, 0x077F), (0xFB50, 0xFDFF), (0xFE70, 0xFEFF)],
+    "Hebrew": [(0x0590, 0x05FF), (0xFB1D, 0xFB4F)],
+    "Devanagari": [(0x0900, 0x097F), (0xA8E0, 0xA8FF)],
+    "Bengali": [(0x0980, 0x09FF)],
+    "Gurmukhi": [(0x0A00, 0x0A7F)],
+    "Gujarati": [(0x0A80, 0x0AFF)],
+    "Oriya": [(0x0B00, 0x0B7F)],
+    "Tamil": [(0x0B80, 0x0BFF)],
+    "Telugu": [(0x0C00, 0x0C7F)],
+    "Kannada": [(0x0C80, 0x0CFF)],
+    "Malayalam": [(0x0D00, 0x0D7F)],
+    "Sinhala": [(0x0D80, 0x0DFF)],
+    "Thai": [(0x0E00, 0x0E7F)],
+    "Lao": [(0x0E80, 0x0EFF)],
+    "Myanmar": [(0x1000, 0x109F)],
+    "Georgian": [(0x10A0, 0x10FF), (0x1C90, 0x1CBF)],
+    "Armenian": [(0x0530, 0x058F)],
+    "Khmer": [(0x1780, 0x17FF)],
+    "Hangul": [(0xAC00, 0xD7AF), (0x1100, 0x11FF), (0x3130, 0x318F)],
+    "Han": [(0x4E00, 0x9FFF), (0x3400, 0x4DBF), (0xF900, 0xFAFF)],
+    "Japanese": [(0x3040, 0x309F), (0x30A0, 0x30FF), (0x4E00, 0x9FFF), (0x3400, 0x4DBF)],
+}
+
+# scripts that pack a word into far fewer characters than Latin text
+COMPACT_SCRIPTS = {"Han", "Japanese", "Hangul"}
+
+# minimum share of letters that must be in the target script (brand names, URLs stay Latin)
+MIN_SCRIPT_RATIO = 0.5
+# share of word 4-grams copied verbatim from the source that counts as an untranslated echo
+MAX_COPY_RATIO = 0.6
+# output-to-source length ratios outside which a finished translation is suspect
+MIN_LENGTH_RATIO = {"compact": 0.15, "default": 0.4}
+MAX_LENGTH_RATIO = 3.5
+
+# process-wide counts of rejected outputs by reason, exposed on /metrics
+VALIDATION_STATS: Dict[str, int] = {}
+
+
+class TranslationValidator:
+    """Cheap local checks that a (partial) translation is in the right language"""
+
+    def __init__(self, source: str, target_language: str, source_language: str = "en"):
+        self.source = source
+        self.target = get_language_by_code(target_language)
+        self.source_script = getattr(get_language_by_code(source_language), "script", "Latin")
+        self.source_shingles = _shingles(source)
+        # thinking beyond this is budget that should have gone to the translation
+        self.max_reasoning_chars = max(4000, 3 * len(source))
+        # outcome of the most recent check, so callers can tell a kept-anyway output from a good one
+        self.last_reason: Optional[str] = None
+
+    def check(self, output: str, final: bool = False) -> Optional[str]:
+        """Return the reason the output looks wrong, or None if it looks fine"""
+        self.last_reason = self._check(output, final)
+        return self.last_reason
+
+    def _check(self, output: str, final: bool) -> Optional[str]:
+        visible, reasoning_chars = split_reasoning(output)
+
+        if reasoning_chars > self.max_reasoning_chars:
+            return self._fail("reasoning_budget")
+
+        if final and not visible.strip():
+            return self._fail("empty")
+
+        if self.target:
+            ratio = script_ratio(visible, self.target.script)
+            if ratio is not None and ratio < MIN_SCRIPT_RATIO:
+                return self._fail("wrong_script")
+
+        # text in the source script can only be an echo if the target shares that script
+        if not self.target or self.target.script == self.source_script:
+            copied = _shingles(visible)
+            if len(copied) >= 5 and len(copied & self.source_shingles) / len(copied) > MAX_COPY_RATIO:
+                return self._fail("source_echo")
+
+        source_length = max(1, len(self.source))
+        compact = self.target is not None and self.target.script in COMPACT_SCRIPTS
+        if len(visible) > MAX_LENGTH_RATIO * source_length + 200:
+            return self._fail("too_long")
+        if final and source_length > 200:
+            min_ratio = MIN_LENGTH_RATIO["compact" if compact else "default"]
+            if len(visible) < min_ratio * source_length:
+                return self._fail("too_short")
+
+        return None
+
+    def _fail(self, reason: str) -> str:
+        VALIDATION_STATS[reason] = VALIDATION_STATS.get(reason, 0) + 1
+        return reason
+
+
+def split_reasoning(output: str) -> Tuple[str, int]:
+    """Separate visible text from thinking blocks, including one that is still open"""
+    reasoning_chars = sum(len(block) for block in re.findall(r'<think(?:ing)?>.*?</think(?:ing)?>', output, flags=re.IGNORECASE | re.DOTALL))
+    visible = re.sub(r'<think(?:ing)?>.*?</think(?:ing)?>', '', output, flags=re.IGNORECASE | re.DOTALL)
+
+    unclosed = re.search(r'<think(?:ing)?>', visible, flags=re.IGNORECASE)
+    if unclosed:
+        reasoning_chars += len(visible) - unclosed.start()
+        visible = visible[:unclosed.start()]
+
+    return visible, reasoning_chars
+
+
+def script_ratio(text: str, script: str) -> Optional[float]:
+    """Share of letters in text that belong to script, or None if there are too few letters"""
+    ranges = SCRIPT_RANGES.get(script)
+    if not ranges:
+        return None
+
+    letters = [ord(char) for char in text if char.isalpha()]
+    if len(letters) < 20:
+        return None
+
+    in_script = sum(1 for code in letters if any(start <= code <= end for start, end in ranges))
+    return in_script / len(letters)
+
+
+def _shingles(text: str, size: int = 4) -> Set[Tuple[str, ...]]:
+    words = re.findall(r'\w+', text.lower())
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
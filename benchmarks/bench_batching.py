@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Upstream call count and latency benchmark for cross-request translation batching
+
+Starts the fake upstream, then fires a burst of short social-post
+translations into the same few languages, each as its own request, first
+with one upstream call per translation and then through the micro-batcher.
+
+Usage: python3 benchmarks/bench_batching.py [--requests 60] [--languages 3] [--spread-ms 500]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import uvicorn
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_upstream import UpstreamProfile, create_fake_upstream, synthetic_text
+
+
+LANGUAGES = ["es", "fr", "de", "pt", "ja"]
+
+
+async def burst(linguist, requests: int, languages: list, spread: float, seed: int) -> list:
+    rng = random.Random(seed)
+    posts = [synthetic_text(rng.randint(20, 60)) for _ in range(requests)]
+    latencies = []
+
+    async def one(post: str) -> None:
+        await asyncio.sleep(rng.uniform(0, spread))
+        started = time.perf_counter()
+        await linguist.translate_content(post, languages)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*[one(post) for post in posts])
+    return latencies
+
+
+async def benchmark(args) -> None:
+    upstream = create_fake_upstream(UpstreamProfile([]), args.speed)
+    server = uvicorn.Server(uvicorn.Config(upstream, host="127.0.0.1", port=args.port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    # every post is different anyway; keep the cache from hiding repeated runs
+    os.environ["TRANSLATION_CACHE_TTL_SECONDS"] = "0"
+    from backend.batching import TranslationBatcher
+    from backend.linguist import Linguist
+
+    languages = LANGUAGES[:args.languages]
+    print(f"{args.requests} requests x {len(languages)} languages arriving over {args.spread_ms}ms")
+    print(f"{'mode':<12} {'calls':>6} {'p50':>8} {'p95':>8} {'wall':>8}")
+    try:
+        for label, batcher in (
+            ("individual", None),
+            ("batched", TranslationBatcher(window_seconds=args.window_ms / 1000, max_segments=args.max_segments))
+        ):
+            linguist = Linguist("gsk_bench")
+            linguist.agent.groq_service.batcher = batcher
+            calls_before = upstream.state.calls
+            started = time.perf_counter()
+            latencies = await burst(linguist, args.requests, languages, args.spread_ms / 1000, args.seed)
+            wall = time.perf_counter() - started
+            calls = upstream.state.calls - calls_before
+            ordered = sorted(latencies)
+            print(f"{label:<12} {calls:>6} {statistics.median(ordered):>6.0f}ms "
+                  f"{ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]:>6.0f}ms {wall:>7.2f}s")
+            if batcher:
+                print(f"batcher: {batcher.stats()}")
+    finally:
+        server.should_exit = True
+        await server_task
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--languages", type=int, default=3, help="target languages per request")
+    parser.add_argument("--spread-ms", type=float, default=500, help="window the requests arrive in")
+    parser.add_argument("--window-ms", type=float, default=20, help="batching window")
+    parser.add_argument("--max-segments", type=int, default=8)
+    parser.add_argument("--speed", type=float, default=5.0, help="fake upstream speed-up")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
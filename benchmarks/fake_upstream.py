@@ -0,0 +1,160 @@
+"""
+Local stand-in for the Groq chat completions API
+
+Replays the latency, token-count and error distributions recorded in
+request traces (see backend/tracing.py), so the backend can be load-tested
+without a real key. Point the backend at it with GROQ_BASE_URL.
+"""
+
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.types import AVAILABLE_LANGUAGES
+
+
+FILLER_WORDS = "our team builds simple tools that help people work together across every language".split()
+
+
+class UpstreamProfile:
+    """Per-task and per-language samples of upstream calls from captured traces"""
+
+    def __init__(self, traces: List[dict]):
+        self.samples: Dict[Tuple[str, Optional[str]], List[dict]] = defaultdict(list)
+        for trace in traces:
+            for call in trace.get("calls", []):
+                task = call.get("task", "generation")
+                self.samples[(task, call.get("language"))].append(call)
+                self.samples[(task, None)].append(call)
+
+        if not self.samples:
+            # no traces: a plausible default so the tool still runs
+            self.samples[("generation", None)].append({"latencyMs": 1500, "completionTokens": 600})
+            self.samples[("translation", None)].append({"latencyMs": 1200, "completionTokens": 700})
+
+    def sample(self, task: str, language: Optional[str]) -> dict:
+        candidates = (
+            self.samples.get((task, language))
+            or self.samples.get((task, None))
+            or [call for calls in self.samples.values() for call in calls]
+        )
+        return random.choice(candidates)
+
+
+def classify(messages: List[dict]) -> Tuple[str, Optional[str]]:
+    """Work out whether a request is a translation, and into which language"""
+    system = next((m["content"] for m in messages if m["role"] == "system"), "")
+    if not system.startswith("You are a professional translation tool"):
+        return "generation", None
+
+    user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    match = re.search(r"TO ([A-Za-z\-]+):", user)
+    if not match:
+        return "translation", None
+
+    codes = {lang.code.upper(): lang.code for lang in AVAILABLE_LANGUAGES}
+    return "translation", codes.get(match.group(1).upper())
+
+
+def batch_markers(messages: List[dict]) -> int:
+    """Number of segments in a batched translation prompt (see backend/batching.py), 0 if not batched"""
+    user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    return len(re.findall(r"^<<<\d+>>>$", user, re.MULTILINE))
+
+
+def synthetic_text(tokens: int) -> str:
+    """Plain-text paragraphs roughly `tokens` long"""
+    words = [random.choice(FILLER_WORDS) for _ in range(max(1, int(tokens * 0.75)))]
+    paragraphs = [" ".join(words[i:i + 40]).capitalize() + "." for i in range(0, len(words), 40)]
+    return "\n\n".join(paragraphs)
+
+
+def create_fake_upstream(profile: UpstreamProfile, speed: float = 1.0) -> FastAPI:
+    """Build an app that answers chat completions like the traced upstream did"""
+    app = FastAPI(title="Fake Groq upstream")
+    app.state.calls = 0
+
+    @app.get("/openai/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "replay", "object": "model", "created": 0, "owned_by": "replay"}]}
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        task, language = classify(body.get("messages", []))
+        call = profile.sample(task, language)
+        app.state.calls += 1
+
+        await asyncio.sleep(call.get("latencyMs", 1000) / 1000 / speed)
+
+        error = call.get("error")
+        if error:
+            status_code = error if isinstance(error, int) else 500
+            headers = {"retry-after": "1"} if status_code == 429 else {}
+            return JSONResponse(
+                {"error": {"message": f"Replayed upstream error {error}", "type": "replay_error"}},
+                status_code=status_code,
+                headers=headers
+            )
+
+        completion_tokens = call.get("completionTokens") or 500
+        prompt_tokens = call.get("promptTokens") or 400
+        content = synthetic_text(call.get("visibleTokens") or completion_tokens)
+        segments = batch_markers(body.get("messages", []))
+        if segments:
+            # answer in the marker format so the backend can split the reply again
+            content = "\n\n".join(
+                f"<<<{index}>>>\n{synthetic_text(max(1, (call.get('visibleTokens') or completion_tokens) // segments))}"
+                for index in range(1, segments + 1)
+            )
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+        created = int(time.time())
+        model = body.get("model", "replay")
+
+        if body.get("stream"):
+            async def events():
+                for start in range(0, len(content), 64):
+                    chunk = {
+                        "id": "replay", "object": "chat.completion.chunk", "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": {"content": content[start:start + 64]}, "finish_reason": None}]
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                final = {
+                    "id": "replay", "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    "x_groq": {"id": "replay", "usage": usage}
+                }
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        return JSONResponse({
+            "id": "replay",
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        })
+
+    return app
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Accelerated replay of captured request traces
+
+Reads a trace file written with TRACE_CAPTURE_PATH set, starts a fake Groq
+upstream that reproduces the recorded per-call latencies and errors, and
+drives the backend app in-process with the same request shapes at the
+recorded arrival offsets, compressed by --speed. Prompts are synthetic text
+of the recorded length; no real key or network access is needed.
+
+Usage: python3 benchmarks/replay.py traces.jsonl [--speed 10] [--limit 500]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List
+
+import httpx
+import uvicorn
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_upstream import UpstreamProfile, create_fake_upstream, synthetic_text
+
+# session follow-ups need a session from the original server; their calls still feed the upstream profile
+REPLAYABLE_ENDPOINTS = ("/api/generate", "/api/retranslate")
+
+
+def load_traces(path: str, limit: int = 0) -> List[dict]:
+    with open(path, encoding="utf-8") as trace_file:
+        traces = [json.loads(line) for line in trace_file if line.strip()]
+    traces.sort(key=lambda trace: trace["arrivalTs"])
+    return traces[:limit] if limit else traces
+
+
+def build_request(trace: dict) -> dict:
+    """Request body with the recorded shape and synthetic text of the recorded length"""
+    prompt = synthetic_text(max(1, trace.get("promptChars", 200) // 4))[:max(1, trace.get("promptChars", 200))]
+
+    if trace["endpoint"] == "/api/retranslate":
+        paragraphs = synthetic_text(max(200, trace.get("promptChars", 800)) // 4).split("\n\n")
+        previous = "\n\n".join(paragraphs)
+        edited = "\n\n".join(paragraphs[:-1] + [synthetic_text(40)])
+        return {
+            "previousGeneration": {
+                "originalContent": {"language": "en", "content": previous},
+                "translations": [
+                    {"language": code, "content": previous} for code in trace.get("targetLanguages", [])
+                ],
+                "processingTime": 0
+            },
+            "editedContent": edited
+        }
+
+    return {
+        "prompt": prompt,
+        "contentType": trace.get("contentType", "email"),
+        "targetLanguages": trace.get("targetLanguages", []),
+        "sourceLanguage": trace.get("sourceLanguage", "en"),
+        "tone": trace.get("tone", "professional"),
+        "length": trace.get("length", "medium")
+    }
+
+
+async def replay_one(client: httpx.AsyncClient, trace: dict, delay: float, speed: float, results: list) -> None:
+    await asyncio.sleep(delay)
+
+    headers = {"X-API-Key": f"replay-{trace.get('tenant', 'anonymous')}"}
+    if trace.get("priority"):
+        headers["X-Priority"] = trace["priority"]
+    if trace.get("deadlineSeconds"):
+        headers["X-Request-Timeout"] = str(trace["deadlineSeconds"] / speed)
+
+    started = time.perf_counter()
+    try:
+        response = await client.post(trace["endpoint"], json=build_request(trace), headers=headers)
+        status = response.status_code
+    except Exception as error:
+        status = type(error).__name__
+    latency_ms = (time.perf_counter() - started) * 1000
+
+    results.append({
+        "status": status,
+        "priority": trace.get("priority", "interactive"),
+        "latencyMs": latency_ms,
+        "recordedMs": trace.get("durationMs", 0) / speed,
+        "recordedStatus": trace.get("status")
+    })
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def replay(traces: List[dict], speed: float, port: int) -> dict:
+    upstream = create_fake_upstream(UpstreamProfile(traces), speed)
+    server = uvicorn.Server(uvicorn.Config(upstream, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    # the Groq SDK reads this when each client is created
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{port}"
+    from backend.server import app
+
+    results: list = []
+    first_arrival = traces[0]["arrivalTs"]
+    started = time.perf_counter()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=None) as client:
+            await asyncio.gather(*(
+                replay_one(client, trace, (trace["arrivalTs"] - first_arrival) / speed, speed, results)
+                for trace in traces if trace["endpoint"] in REPLAYABLE_ENDPOINTS
+            ))
+    finally:
+        server.should_exit = True
+        await server_task
+
+    return {
+        "results": results,
+        "wallSeconds": time.perf_counter() - started,
+        "upstreamCalls": upstream.state.calls
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces", help="JSONL trace file written with TRACE_CAPTURE_PATH")
+    parser.add_argument("--speed", type=float, default=10.0, help="time compression factor for arrivals and latencies")
+    parser.add_argument("--limit", type=int, default=0, help="replay only the first N traces")
+    parser.add_argument("--port", type=int, default=8765, help="port for the fake upstream")
+    args = parser.parse_args()
+
+    traces = load_traces(args.traces, args.limit)
+    if not traces:
+        print("No traces to replay")
+        return
+
+    span = traces[-1]["arrivalTs"] - traces[0]["arrivalTs"]
+    print(f"Replaying {len(traces)} requests spanning {span:.1f}s at {args.speed:g}x")
+
+    summary = asyncio.run(replay(traces, args.speed, args.port))
+    results = summary["results"]
+    latencies = [result["latencyMs"] for result in results]
+    recorded = [result["recordedMs"] for result in results]
+
+    print(f"wall time {summary['wallSeconds']:.2f}s, {summary['upstreamCalls']} upstream calls")
+    print(f"status: {dict(Counter(str(result['status']) for result in results))}")
+    print(f"recorded status: {dict(Counter(str(result['recordedStatus']) for result in results))}")
+    print(f"{'':<12} {'p50':>9} {'p95':>9} {'p99':>9} {'mean':>9}")
+    lanes = sorted({result["priority"] for result in results})
+    rows = [("replayed", latencies), ("recorded", recorded)]
+    if len(lanes) > 1:
+        rows += [(lane, [result["latencyMs"] for result in results if result["priority"] == lane]) for lane in lanes]
+    for label, values in rows:
+        print(f"{label:<12} {percentile(values, 0.5):>7.0f}ms {percentile(values, 0.95):>7.0f}ms "
+              f"{percentile(values, 0.99):>7.0f}ms {statistics.fmean(values):>7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
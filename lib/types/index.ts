@@ -186,6 +186,7 @@ export interface GenerationResponse {
   translations: GeneratedContent[];
   totalTokensUsed?: number;
   processingTime: number;
+  sessionId?: string;
 }
 
 export interface GroqConfig {